@@ -0,0 +1,105 @@
+import argparse
+import glob
+import random
+import time
+import tracemalloc
+from typing import Callable
+
+from base_classes.lexicon import LEXICON_BACKENDS, LanguageLexicon
+from branching.branching_index import TotalBranchingIndex
+from solver.word_train_solver import WordTrainSolver
+
+
+def _time_per_call(function: Callable, arguments: list) -> float:
+    """
+    Returns the mean time in microseconds to call function on each argument.
+    """
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e6
+
+
+def benchmark_backend(
+    words: list[str], backend_name: str, num_queries: int, seed: int = 0
+) -> dict[str, float]:
+    """
+    Build a backend for words and measure its memory and the latency of
+    the queries the solver and indices make.
+    """
+    rng = random.Random(seed)
+    queried_words = [rng.choice(words) for _ in range(num_queries)]
+    prefixes = [word[: rng.randint(1, len(word))] for word in queried_words]
+    two_letter_prefixes = list(sorted({word[:2] for word in words if len(word) > 1}))
+    solved_prefixes = rng.sample(two_letter_prefixes, min(20, len(two_letter_prefixes)))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    lexicon = LanguageLexicon(words, LEXICON_BACKENDS[backend_name])
+    trie = lexicon.trie
+    build_seconds = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def contains(word: str) -> bool:
+        node = trie.get_prefix_node(word)
+        return node is not None and node.is_leaf
+
+    start = time.perf_counter()
+    TotalBranchingIndex(lexicon).calculate()
+    index_seconds = time.perf_counter() - start
+    solver = WordTrainSolver(lexicon, cache_depth=-1)
+    return {
+        "build (s)": build_seconds,
+        # The words themselves are shared with the lexicon, so this is
+        # the memory of the structure alone
+        "memory (MiB)": memory / 2**20,
+        "prefix (us)": _time_per_call(trie.get_prefix_node, prefixes),
+        "contains (us)": _time_per_call(contains, queried_words),
+        "words by prefix (us)": _time_per_call(
+            trie.get_all_words, solved_prefixes * (num_queries // 100 + 1)
+        ),
+        "solve (ms)": _time_per_call(
+            lambda prefix: solver.solve(prefix, 2), solved_prefixes
+        )
+        / 1000,
+        "total index (s)": index_seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Lexicon Backend Benchmark",
+        description="Compares the memory and latency of the lexicon backends",
+    )
+    parser.add_argument(
+        "lexicons",
+        nargs="*",
+        help="Specify the files containing line-separated words (default = every .txt in ./lexicons)",
+    )
+    parser.add_argument(
+        "-q",
+        "--num_queries",
+        type=int,
+        default=100000,
+        help="The number of prefix and membership queries",
+    )
+    args = parser.parse_args()
+    lexicon_paths = args.lexicons or list(sorted(glob.glob("./lexicons/*.txt")))
+    rows = []
+    for lexicon_path in lexicon_paths:
+        words = list(LanguageLexicon(lexicon_path).words)
+        for backend_name in LEXICON_BACKENDS:
+            print(f"Benchmarking {backend_name} for {lexicon_path} ...")
+            results = benchmark_backend(words, backend_name, args.num_queries)
+            rows.append((lexicon_path, backend_name, results))
+    columns = list(rows[0][2])
+    print()
+    print("\t".join(["lexicon", "backend"] + columns))
+    for lexicon_path, backend_name, results in rows:
+        print(
+            "\t".join(
+                [lexicon_path, backend_name]
+                + [f"{results[column]:.3f}" for column in columns]
+            )
+        )
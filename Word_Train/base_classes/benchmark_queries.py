@@ -0,0 +1,103 @@
+import argparse
+import random
+import time
+from typing import Callable
+
+from base_classes.lexicon import LEXICON_BACKENDS, LanguageLexicon
+
+
+def _queries_per_second(function: Callable, queries: list[str]) -> float:
+    """
+    Returns the number of queries per second answered by function(queries).
+    """
+    start = time.perf_counter()
+    function(queries)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def benchmark_queries(
+    lexicon: LanguageLexicon, num_queries: int, seed: int = 0
+) -> dict[str, tuple[float, float]]:
+    """
+    Compare the throughput of the batched queries with answering the same
+    queries one at a time through the lexicon's backend.
+    Returns (one at a time, batched) queries per second for each kind of query.
+    """
+    rng = random.Random(seed)
+    words = lexicon.trie.words_by_id
+    # Half real words, half (mostly) misses
+    queried_words = [
+        rng.choice(words) + ("" if i % 2 else rng.choice("aeiouxyz"))
+        for i in range(num_queries)
+    ]
+    prefixes = [word[: rng.randint(1, len(word))] for word in queried_words]
+    trie = lexicon.trie
+
+    def contains_one_at_a_time(words: list[str]) -> list[bool]:
+        results = []
+        for word in words:
+            node = trie.get_prefix_node(word)
+            results.append(node is not None and node.is_leaf)
+        return results
+
+    def is_prefix_one_at_a_time(prefixes: list[str]) -> list[bool]:
+        return [trie.get_prefix_node(prefix) is not None for prefix in prefixes]
+
+    def count_completions_one_at_a_time(prefixes: list[str]) -> list[int]:
+        return [len(trie.get_all_words(prefix, min_length=4)) for prefix in prefixes]
+
+    return {
+        "contains": (
+            _queries_per_second(contains_one_at_a_time, queried_words),
+            _queries_per_second(lexicon.contains_many, queried_words),
+        ),
+        "is prefix": (
+            _queries_per_second(is_prefix_one_at_a_time, prefixes),
+            _queries_per_second(lexicon.is_prefix_many, prefixes),
+        ),
+        # Counting one prefix at a time lists the words, so use fewer queries
+        "count completions": (
+            _queries_per_second(
+                count_completions_one_at_a_time, prefixes[: num_queries // 100]
+            ),
+            _queries_per_second(
+                lambda prefixes: lexicon.count_completions_many(prefixes, 4), prefixes
+            ),
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Batched Query Benchmark",
+        description="Compares batched membership and prefix queries with one-at-a-time queries",
+    )
+    parser.add_argument(
+        "lexicon", help="Specify the file containing line-separated words"
+    )
+    parser.add_argument(
+        "-q",
+        "--num_queries",
+        type=int,
+        default=1000000,
+        help="The number of queries of each kind",
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=LEXICON_BACKENDS,
+        default="trie",
+        help="The data structure to store the lexicon in",
+    )
+    args = parser.parse_args()
+    print("\nLoading lexicon ... ")
+    lexicon = LanguageLexicon(args.lexicon, LEXICON_BACKENDS[args.backend])
+    lexicon.trie.words_by_id  # Build the word numbering before timing
+    print("\nBenchmarking ...")
+    results = benchmark_queries(lexicon, args.num_queries)
+    print("\t".join(["query", "one at a time (M/s)", "batched (M/s)", "speedup"]))
+    for query, (one_at_a_time, batched) in results.items():
+        print(
+            f"{query}\t{one_at_a_time / 1e6:.3f}\t{batched / 1e6:.3f}\t"
+            f"{batched / one_at_a_time:.1f}x"
+        )
@@ -0,0 +1,129 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from base_classes.lexicon import (
+    LEXICON_BACKENDS,
+    PACKED_WORDS_EXTENSION,
+    LanguageLexicon,
+    Trie,
+)
+
+
+# The ways of holding a lexicon's words that are compared
+REPRESENTATIONS = ["set", "packed", "memory-mapped"]
+
+
+def _get_resident_bytes() -> int | None:
+    """
+    Returns this process's resident memory in bytes (None if unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _load(
+    path: str, representation: str, backend_name: str, trace_memory: bool
+) -> tuple[float, int | None, int | None, int]:
+    """
+    Load a lexicon for the words in path, with its words held as
+    representation, along with its backend and word IDs, then read every
+    word by ID and check that it is a word.
+    Returns the seconds taken, the traced Python memory (None unless
+    trace_memory, since tracing slows down allocations), the growth in
+    resident memory (None if unavailable), and the number of words.
+    This runs in a fresh worker process, so nothing else is resident.
+    """
+    backend = LEXICON_BACKENDS[backend_name]
+    resident = _get_resident_bytes()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if representation == "set":
+        # How words were held before they were packed: a set, and a sorted
+        # list for the word IDs (which was all a sorted array backend held)
+        with open(path) as file:
+            words = {line.strip().lower() for line in file.readlines()}
+        words_by_id = list(sorted(words))
+        lexicon = (words, words_by_id, Trie.build(words) if backend is Trie else None)
+    else:
+        lexicon = LanguageLexicon(path, backend)
+        words = lexicon.words
+        words_by_id = lexicon.trie.words_by_id
+    num_words = sum(word in words for word in words_by_id)
+    seconds = time.perf_counter() - start
+    memory = None
+    if trace_memory:
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    if resident is not None:
+        resident = _get_resident_bytes() - resident
+    return seconds, memory, resident, num_words
+
+
+def benchmark_words(
+    lexicon_path: str, backend_name: str = "trie"
+) -> dict[str, tuple[float, int, int | None]]:
+    """
+    Compare the load time and memory of a lexicon (its words, backend and
+    word IDs) with the words as a set of str, packed, and packed and
+    memory-mapped from a file.
+    """
+    results = dict()
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        packed_path = os.path.join(directory, f"words{PACKED_WORDS_EXTENSION}")
+        LanguageLexicon(lexicon_path).words.write(packed_path)
+        for representation in REPRESENTATIONS:
+            path = packed_path if representation == "memory-mapped" else lexicon_path
+            # Time and trace separate loads, each in a fresh process
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                seconds, _, resident, _ = executor.submit(
+                    _load, path, representation, backend_name, False
+                ).result()
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                _, memory, _, _ = executor.submit(
+                    _load, path, representation, backend_name, True
+                ).result()
+            results[representation] = (seconds, memory, resident)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Word Storage Benchmark",
+        description="Compares a lexicon's memory with its words as a set and packed",
+    )
+    parser.add_argument(
+        "lexicons",
+        nargs="*",
+        help="Specify the files containing line-separated words (default = every .txt in ./lexicons)",
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=LEXICON_BACKENDS,
+        default="trie",
+        help="The data structure to store the lexicon in",
+    )
+    args = parser.parse_args()
+    lexicon_paths = args.lexicons or list(sorted(glob.glob("./lexicons/*.txt")))
+    columns = ["lexicon", "storage", "load (s)", "Python (MiB)", "resident (MiB)"]
+    print("\t".join(columns))
+    for lexicon_path in lexicon_paths:
+        for representation, (seconds, memory, resident) in benchmark_words(
+            lexicon_path, args.backend
+        ).items():
+            resident = "-" if resident is None else f"{resident / 2**20:.1f}"
+            print(
+                f"{lexicon_path}\t{representation}\t{seconds:.2f}\t"
+                f"{memory / 2**20:.1f}\t{resident}"
+            )
@@ -0,0 +1,72 @@
+import argparse
+import glob
+import time
+
+from base_classes.lexicon import LanguageLexicon, build_game_trie, count_nodes
+
+
+def get_game_trie_sizes(
+    lexicon: LanguageLexicon, min_word_lengths: list[int]
+) -> list[dict[str, float]]:
+    """
+    Compare the size of the lexicon's trie with its game trie
+    for each minimum word length.
+    """
+    trie = lexicon.trie
+    num_nodes = count_nodes(trie.root)
+    rows = []
+    for min_word_length in min_word_lengths:
+        start = time.perf_counter()
+        game_trie = build_game_trie(trie, min_word_length)
+        build_seconds = time.perf_counter() - start
+        num_game_nodes = count_nodes(game_trie.root)
+        rows.append(
+            {
+                "min length": min_word_length,
+                "words": trie.root.word_count,
+                "final words": game_trie.root.word_count,
+                "nodes": num_nodes,
+                "game nodes": num_game_nodes,
+                "reduction (%)": 100 * (1 - num_game_nodes / num_nodes),
+                "build (s)": build_seconds,
+            }
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Game Trie Sizes",
+        description="Reports how much smaller each lexicon's game tries are than its trie",
+    )
+    parser.add_argument(
+        "lexicons",
+        nargs="*",
+        help="Specify the files containing line-separated words (default = every .txt in ./lexicons)",
+    )
+    parser.add_argument(
+        "-m",
+        "--min_word_length",
+        type=int,
+        nargs="+",
+        default=[3, 4, 5],
+        help="The minimum word lengths to build game tries for",
+    )
+    args = parser.parse_args()
+    lexicon_paths = args.lexicons or list(sorted(glob.glob("./lexicons/*.txt")))
+    header_printed = False
+    for lexicon_path in lexicon_paths:
+        lexicon = LanguageLexicon(lexicon_path)
+        for row in get_game_trie_sizes(lexicon, args.min_word_length):
+            if not header_printed:
+                print("\t".join(["lexicon"] + list(row)))
+                header_printed = True
+            print(
+                "\t".join(
+                    [lexicon_path]
+                    + [
+                        f"{value:.3f}" if isinstance(value, float) else str(value)
+                        for value in row.values()
+                    ]
+                )
+            )
@@ -1,6 +1,64 @@
 import abc
-from typing import Iterable, TypeVar
-import functools
+import argparse
+import array
+import bisect
+import collections
+import contextlib
+import gc
+import heapq
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import threading
+import weakref
+from collections.abc import Iterator, Sequence, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional (see LanguageLexicon's batched queries)
+    numpy = None
+
+# Compiled tries are pickles, so only load compiled tries you trust
+COMPILED_TRIE_EXTENSION = ".trie"
+COMPILED_TRIE_VERSION = 2
+# Packed word files (see PackedWords) are memory-mapped rather than read
+PACKED_WORDS_EXTENSION = ".words"
+PACKED_WORDS_MAGIC = b"WTWORDS"
+PACKED_WORDS_VERSION = 1
+
+
+# The number of gc_paused blocks running (in any thread), and whether
+# the garbage collector was enabled before the first of them
+_gc_pause_lock = threading.Lock()
+_gc_pause_count = 0
+_gc_was_enabled = False
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector while building large numbers of
+    objects (which otherwise triggers repeated full collections).
+    Pauses may overlap, including across threads: the collector is only
+    enabled again once the last of them ends.
+    """
+    global _gc_pause_count, _gc_was_enabled
+    with _gc_pause_lock:
+        if not _gc_pause_count:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pause_count += 1
+    try:
+        yield
+    finally:
+        with _gc_pause_lock:
+            _gc_pause_count -= 1
+            if not _gc_pause_count and _gc_was_enabled:
+                gc.enable()
 
 
 class TrieNode:
@@ -11,22 +69,269 @@ class TrieNode:
     def __init__(self) -> None:
         self.children: dict[str, TrieNode] = dict()
         self.is_leaf: bool = False
+        # The number of words in this node's subtree (including its own word)
+        self.word_count: int = 0
+
 
+class LexiconBackend(abc.ABC):
+    """
+    An abstract class for the data structures that store a lexicon's words
+    and answer prefix queries (see LanguageLexicon's backend).
+
+    Nodes represent prefixes and have the same interface as TrieNode:
+    children (a dict of letter to node), is_leaf and word_count.
 
-class Trie:
+    Words are numbered by their position in sorted order (see words_by_id).
+    """
+
+    @classmethod
+    @abc.abstractmethod
+    def build(cls, words: Iterable[str]) -> "LexiconBackend":
+        """
+        Returns a new backend containing words. If words is a PackedWords,
+        it becomes the backend's words_by_id (rather than being copied),
+        and is kept up to date as words are inserted or removed.
+        """
+        raise NotImplementedError()
+
+    @property
+    @abc.abstractmethod
+    def root(self):
+        """
+        Returns the node for the empty prefix
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def insert(self, word: str) -> bool:
+        """
+        Insert word, returning whether it was not already present.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def remove(self, word: str) -> bool:
+        """
+        Remove word, returning whether it was present.
+        """
+        raise NotImplementedError()
+
+    @property
+    @abc.abstractmethod
+    def words_by_id(self) -> "PackedWords":
+        """
+        Returns all words in sorted order, so that a word's index is its ID.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_sorted_words(self, prefix: str) -> list[str]:
+        """
+        Returns the words starting with prefix in sorted order.
+        """
+        raise NotImplementedError()
+
+    def get_word_id_range(self, prefix: str) -> tuple[int, int]:
+        """
+        Returns the half-open range of IDs of the words starting with prefix.
+        """
+        words = self.words_by_id
+        start = words.bisect_left(prefix)
+        end = words.bisect_left(prefix + chr(0x10FFFF), start)
+        return start, end
+
+    @abc.abstractmethod
+    def get_path_nodes(self, prefix: str) -> list:
+        """
+        Returns the nodes for "" and each prefix of prefix, stopping
+        early if prefix leaves the backend.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_prefix_node(self, prefix: str):
+        """
+        Returns the node for prefix, or None if no word starts with prefix.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get_all_words(
+        self, prefix: str, stop_at_leaf: bool = False, min_length: int = 0
+    ) -> list[str]:
+        """
+        Returns the words starting with prefix of at least min_length letters
+        (only the shortest along each path if stop_at_leaf).
+        """
+        raise NotImplementedError()
+
+
+class Trie(LexiconBackend):
     """
     A basic implementation of a prefix tree.
+
+    Words are numbered by their position in sorted order (see words_by_id).
+    Since a preorder DFS that visits children in sorted order visits words in
+    sorted order, every subtree covers a contiguous range of IDs, and the rank
+    of a word within a subtree can be found from the nodes' word counts alone.
     """
 
     def __init__(self) -> None:
-        self.root = TrieNode()
+        self._root = TrieNode()
+        # Kept up to date once built (see words_by_id)
+        self._words_by_id: PackedWords | None = None
+
+    @classmethod
+    def build(cls, words: Iterable[str]) -> "Trie":
+        trie = cls()
+        with gc_paused():
+            for word in words:
+                trie.insert(word)
+        if isinstance(words, PackedWords):
+            trie._words_by_id = words
+        return trie
+
+    @property
+    def root(self) -> TrieNode:
+        return self._root
 
-    def insert(self, word: str) -> None:
+    def insert(self, word: str) -> bool:
+        """
+        Insert word, returning whether it was not already in the trie.
+        """
         current = self.root
+        current.word_count += 1
         for letter in word:
-            current.children[letter] = current.children.get(letter, TrieNode())
-            current = current.children[letter]
+            child = current.children.get(letter)
+            if child is None:
+                child = current.children[letter] = TrieNode()
+            current = child
+            current.word_count += 1
+        if current.is_leaf:
+            # The word was already here, so undo the counts
+            self._add_to_word_counts(word, -1)
+            return False
         current.is_leaf = True
+        if self._words_by_id is not None:
+            self._words_by_id.add(word)
+        return True
+
+    def remove(self, word: str) -> bool:
+        """
+        Remove word, pruning any branch left without words.
+        Returns whether the word was in the trie.
+        """
+        node = self.get_prefix_node(word)
+        if not node or not node.is_leaf:
+            return False
+        node.is_leaf = False
+        self._add_to_word_counts(word, -1)
+        # Prune the shallowest node on the path that no longer leads to a word
+        current = self.root
+        for letter in word:
+            child = current.children[letter]
+            if not child.word_count:
+                del current.children[letter]
+                break
+            current = child
+        if self._words_by_id is not None:
+            self._words_by_id.discard(word)
+        return True
+
+    def _add_to_word_counts(self, prefix: str, amount: int) -> None:
+        for node in self.get_path_nodes(prefix):
+            node.word_count += amount
+
+    def attach(self, prefix: str, node: TrieNode) -> None:
+        """
+        Attach node (and its subtree) as the node for prefix, creating
+        any missing intermediate nodes. Any existing node for prefix is replaced.
+        """
+        if not prefix:
+            raise Exception("cannot attach a node as the root!")
+        current = self.root
+        for letter in prefix[:-1]:
+            child = current.children.get(letter)
+            if child is None:
+                child = current.children[letter] = TrieNode()
+            current = child
+        existing = current.children.get(prefix[-1])
+        current.children[prefix[-1]] = node
+        self._add_to_word_counts(
+            prefix[:-1], node.word_count - (existing.word_count if existing else 0)
+        )
+        if self._words_by_id is not None:
+            # Only the words in the replaced subtree change
+            if existing:
+                for word in self._list_sorted_words(existing, prefix):
+                    self._words_by_id.discard(word)
+            for word in self._list_sorted_words(node, prefix):
+                self._words_by_id.add(word)
+
+    def detach(self, prefix: str) -> None:
+        """
+        Remove the node for prefix (and its subtree), pruning any branch
+        left without words.
+        """
+        if not prefix:
+            raise Exception("cannot detach the root!")
+        node = self.get_prefix_node(prefix)
+        if node is None:
+            return
+        if self._words_by_id is not None:
+            for word in self._list_sorted_words(node, prefix):
+                self._words_by_id.discard(word)
+        self._add_to_word_counts(prefix[:-1], -node.word_count)
+        current = self.root
+        for letter in prefix:
+            child = current.children[letter]
+            if not child.word_count or child is node:
+                del current.children[letter]
+                break
+            current = child
+
+    @property
+    def words_by_id(self) -> "PackedWords":
+        """
+        Returns all words in the trie in sorted order, so that a word's
+        index is its ID. This is built when first needed, then kept up to
+        date as the trie changes.
+        """
+        if self._words_by_id is None:
+            self._words_by_id = PackedWords(self.get_sorted_words(""))
+        return self._words_by_id
+
+    def get_sorted_words(self, prefix: str) -> list[str]:
+        """
+        Returns the words starting with prefix in sorted order.
+        """
+        node = self.get_prefix_node(prefix)
+        return self._list_sorted_words(node, prefix) if node else []
+
+    @staticmethod
+    def _list_sorted_words(node: TrieNode, prefix: str) -> list[str]:
+        """
+        Returns the words in node's subtree (node being prefix's node) in sorted order.
+        """
+        words = []
+        nodes = [(node, prefix)]
+        while nodes:
+            node, prefix = nodes.pop()
+            if node.is_leaf:
+                words.append(prefix)
+            for letter in sorted(node.children, reverse=True):
+                nodes.append((node.children[letter], prefix + letter))
+        return words
+
+    def get_path_nodes(self, prefix: str) -> list[TrieNode]:
+        current = self.root
+        nodes = [current]
+        for letter in prefix:
+            current = current.children.get(letter)
+            if current is None:
+                break
+            nodes.append(current)
+        return nodes
 
     def get_prefix_node(self, prefix: str) -> TrieNode | None:
         current = self.root
@@ -55,24 +360,892 @@ class Trie:
         return words
 
 
+class SortedArrayNode:
+    """
+    A view of the words starting with prefix in a SortedArrayBackend
+    (the IDs from start up to end), with the same interface as TrieNode.
+    Each child is found with a binary search when children is first read.
+    Views are compared by prefix, and are only valid until the backend next changes.
+    """
+
+    __slots__ = ("backend", "prefix", "start", "end", "_children")
+
+    def __init__(
+        self, backend: "SortedArrayBackend", prefix: str, start: int, end: int
+    ) -> None:
+        self.backend = backend
+        self.prefix = prefix
+        self.start = start
+        self.end = end
+        self._children: dict[str, SortedArrayNode] | None = None
+
+    @property
+    def word_count(self) -> int:
+        return self.end - self.start
+
+    @property
+    def is_leaf(self) -> bool:
+        # A word comes before any longer word it prefixes
+        return (
+            self.start < self.end
+            and self.backend.words_by_id[self.start] == self.prefix
+        )
+
+    @property
+    def children(self) -> dict[str, "SortedArrayNode"]:
+        if self._children is None:
+            words = self.backend.words_by_id
+            depth = len(self.prefix)
+            self._children = dict()
+            start = self.start + int(self.is_leaf)
+            while start < self.end:
+                child_prefix = words[start][: depth + 1]
+                end = words.bisect_left(child_prefix + chr(0x10FFFF), start, self.end)
+                self._children[child_prefix[-1]] = SortedArrayNode(
+                    self.backend, child_prefix, start, end
+                )
+                start = end
+        return self._children
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, SortedArrayNode)
+            and self.backend is other.backend
+            and self.prefix == other.prefix
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.prefix)
+
+
+class SortedArrayBackend(LexiconBackend):
+    """
+    Stores words as PackedWords (shared with the lexicon rather than copied)
+    and answers prefix queries with binary searches, so there are no
+    per-prefix objects to build or keep in memory. Nodes are SortedArrayNode
+    views created as they are visited, which makes traversals slower than
+    with a Trie.
+    """
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        if not isinstance(words, PackedWords):
+            words = PackedWords(words)
+        self._words = words
+
+    @classmethod
+    def build(cls, words: Iterable[str]) -> "SortedArrayBackend":
+        return cls(words)
+
+    @property
+    def root(self) -> SortedArrayNode:
+        return SortedArrayNode(self, "", 0, len(self._words))
+
+    def insert(self, word: str) -> bool:
+        # (The lexicon may already have added word to the shared words)
+        is_present = word in self._words
+        if not is_present:
+            self._words.add(word)
+        return not is_present
+
+    def remove(self, word: str) -> bool:
+        is_present = word in self._words
+        if is_present:
+            self._words.remove(word)
+        return is_present
+
+    @property
+    def words_by_id(self) -> "PackedWords":
+        return self._words
+
+    def get_sorted_words(self, prefix: str) -> list[str]:
+        start, end = self.get_word_id_range(prefix)
+        return self._words[start:end]
+
+    def get_path_nodes(self, prefix: str) -> list[SortedArrayNode]:
+        nodes = [self.root]
+        for i in range(1, len(prefix) + 1):
+            node = self.get_prefix_node(prefix[:i])
+            if node is None:
+                break
+            nodes.append(node)
+        return nodes
+
+    def get_prefix_node(self, prefix: str) -> SortedArrayNode | None:
+        start, end = self.get_word_id_range(prefix)
+        if start == end and prefix:
+            return None
+        return SortedArrayNode(self, prefix, start, end)
+
+    def get_all_words(
+        self, prefix: str, stop_at_leaf: bool = False, min_length: int = 0
+    ) -> list[str]:
+        words = []
+        last_word = None
+        for word in self.get_sorted_words(prefix):
+            # Every word after last_word that it prefixes is in its subtree
+            if stop_at_leaf and last_word is not None and word.startswith(last_word):
+                continue
+            if len(word) >= min_length:
+                words.append(word)
+                last_word = word
+        return words
+
+
+def _encode_subtrie(node: TrieNode) -> tuple:
+    """
+    Flatten node's subtree into arrays (much faster to pickle and load than
+    the nodes themselves): the nodes are numbered in preorder, and for every
+    node but node itself (number 0), its letter and its parent's number.
+    """
+    letters = []
+    parents = array.array("q")
+    is_leafs = array.array("B")
+    word_counts = array.array("q")
+    nodes = [(node, "", -1)]
+    while nodes:
+        node, letter, parent = nodes.pop()
+        number = len(is_leafs)
+        if parent >= 0:
+            letters.append(letter)
+            parents.append(parent)
+        is_leafs.append(node.is_leaf)
+        word_counts.append(node.word_count)
+        for letter in sorted(node.children, reverse=True):
+            nodes.append((node.children[letter], letter, number))
+    return "".join(letters), parents, is_leafs, word_counts
+
+
+def _decode_subtrie(encoded_subtrie: tuple) -> TrieNode:
+    """
+    Rebuild the subtree flattened by _encode_subtrie and return its root.
+    """
+    letters, parents, is_leafs, word_counts = encoded_subtrie
+    with gc_paused():
+        nodes = [TrieNode() for _ in range(len(is_leafs))]
+        for node, is_leaf, word_count in zip(nodes, is_leafs, word_counts):
+            node.is_leaf = is_leaf == 1
+            node.word_count = word_count
+        children = itertools.islice(nodes, 1, None)
+        for node, letter, parent in zip(children, letters, parents):
+            nodes[parent].children[letter] = node
+    return nodes[0]
+
+
+def _build_trie_shard(prefix: str, words: list[str]) -> bytes:
+    """
+    Build the subtrie for words sharing prefix and return its node for prefix,
+    encoded (see _encode_subtrie) and pickled. This runs in a worker process.
+    """
+    with gc_paused():
+        trie = Trie()
+        for word in words:
+            trie.insert(word)
+        return pickle.dumps(
+            _encode_subtrie(trie.get_prefix_node(prefix)), pickle.HIGHEST_PROTOCOL
+        )
+
+
+def _get_num_cpus() -> int:
+    """
+    Returns the number of CPUs this process can run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _is_sequential(num_workers: int | None) -> bool:
+    """
+    Returns whether to work in this process rather than in num_workers
+    worker processes (None for one per CPU), which only slow things down
+    without more than one worker and more than one CPU to run them on.
+    """
+    return num_workers == 1 or _get_num_cpus() == 1
+
+
+def _shard_words(
+    words: Iterable[str], shard_prefix_length: int
+) -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Split words into those shorter than shard_prefix_length and
+    shards of words keyed by their first shard_prefix_length letters.
+    """
+    short_words = []
+    shards: dict[str, list[str]] = dict()
+    for word in words:
+        if len(word) < shard_prefix_length:
+            short_words.append(word)
+        else:
+            shards.setdefault(word[:shard_prefix_length], []).append(word)
+    return short_words, shards
+
+
+def _build_pickled_shards(
+    words: Iterable[str], num_workers: int | None, shard_prefix_length: int
+) -> tuple[list[str], list[str], Iterator[bytes]]:
+    """
+    Build the subtries for every shard in parallel.
+    Returns the words too short to shard, the shard prefixes (sorted),
+    and an iterator over the pickled subtries in the same order.
+    """
+    if shard_prefix_length < 1:
+        raise Exception("expected shard_prefix_length >= 1")
+    short_words, shards = _shard_words(words, shard_prefix_length)
+    prefixes = list(sorted(shards))
+
+    def pickled_shards() -> Iterator[bytes]:
+        shard_words = [shards[prefix] for prefix in prefixes]
+        if _is_sequential(num_workers):
+            yield from map(_build_trie_shard, prefixes, shard_words)
+            return
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            yield from executor.map(_build_trie_shard, prefixes, shard_words)
+
+    return short_words, prefixes, pickled_shards()
+
+
+def build_trie(
+    words: Iterable[str], num_workers: int | None, shard_prefix_length: int = 1
+) -> Trie:
+    """
+    Build a trie by sharding words on their first shard_prefix_length letters,
+    building the subtrie for each shard in a worker process,
+    and attaching the subtries under a common root. With only one worker
+    or one CPU, the trie is built in this process instead.
+
+    :param num_workers: the number of worker processes (None for one per CPU)
+    """
+    if _is_sequential(num_workers):
+        return Trie.build(words)
+    short_words, prefixes, pickled_shards = _build_pickled_shards(
+        words, num_workers, shard_prefix_length
+    )
+    trie = Trie()
+    with gc_paused():
+        for word in short_words:
+            trie.insert(word)
+        for prefix, pickled_shard in zip(prefixes, pickled_shards):
+            trie.attach(prefix, _decode_subtrie(pickle.loads(pickled_shard)))
+    return trie
+
+
+def _build_game_node(node, length: int, min_word_length: int) -> TrieNode | None:
+    """
+    Returns a copy of node's subtree (node being a prefix of length letters)
+    pruned for play (see build_game_trie), or None if no game can end in it.
+    """
+    game_node = TrieNode()
+    if node.is_leaf and length >= min_word_length:
+        game_node.is_leaf = True
+        game_node.word_count = 1
+        return game_node
+    for letter, child in node.children.items():
+        game_child = _build_game_node(child, length + 1, min_word_length)
+        if game_child:
+            game_node.children[letter] = game_child
+            game_node.word_count += game_child.word_count
+    return game_node if game_node.word_count else None
+
+
+def build_game_trie(backend: LexiconBackend, min_word_length: int) -> LexiconBackend:
+    """
+    Build a backend (of the same type as backend) holding only what matters
+    for playing Word Train with min_word_length: play ends at the first word
+    of at least min_word_length letters on any path, so nothing below such
+    a word is kept, and shorter words are not words at all. Branches that
+    can no longer end a game are dropped, so every node but the root leads
+    to at least one final word.
+
+    The backend's words (and word IDs) are the final words only.
+    """
+    if not isinstance(backend, Trie):
+        return type(backend).build(
+            backend.get_all_words("", stop_at_leaf=True, min_length=min_word_length)
+        )
+    trie = Trie()
+    with gc_paused():
+        game_root = _build_game_node(backend.root, 0, min_word_length)
+        if game_root and game_root.is_leaf:
+            trie.insert("")
+        elif game_root:
+            for letter, child in sorted(game_root.children.items()):
+                trie.attach(letter, child)
+    return trie
+
+
+def count_nodes(node) -> int:
+    """
+    Returns the number of nodes in node's subtree (including node).
+    """
+    count = 0
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        count += 1
+        nodes.extend(node.children.values())
+    return count
+
+
+def write_compiled_trie(
+    words: Iterable[str],
+    path: str,
+    num_workers: int | None = None,
+    shard_prefix_length: int = 1,
+) -> None:
+    """
+    Build a trie for words in parallel (see build_trie) and write it to path
+    in the compiled format: a pickled header followed by each pickled subtrie,
+    flattened into arrays (see _encode_subtrie). The subtries are written
+    as they arrive from the workers without being loaded in this process.
+    """
+    short_words, prefixes, pickled_shards = _build_pickled_shards(
+        words, num_workers, shard_prefix_length
+    )
+    with open(path, "wb") as file:
+        header = (COMPILED_TRIE_VERSION, short_words, prefixes)
+        pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+        for pickled_shard in pickled_shards:
+            file.write(pickled_shard)
+
+
+def read_compiled_trie(path: str) -> Trie:
+    """
+    Load a trie written by write_compiled_trie.
+    """
+    trie = Trie()
+    with open(path, "rb") as file, gc_paused():
+        version, short_words, prefixes = pickle.load(file)
+        if version != COMPILED_TRIE_VERSION:
+            raise Exception(f"unsupported compiled trie version {version}!")
+        for word in short_words:
+            trie.insert(word)
+        for prefix in prefixes:
+            trie.attach(prefix, _decode_subtrie(pickle.load(file)))
+    return trie
+
+
+class WordIdSet(Set):
+    """
+    A read-only set of words stored as a bitset of word IDs (see LexiconBackend.words_by_id).
+    Bit i corresponds to the i-th word (in sorted order) starting with prefix.
+    Words are only decoded to strings when the set is iterated, and decoding
+    is only valid until the trie next changes.
+    """
+
+    def __init__(self, bits: int, trie: LexiconBackend, prefix: str = "") -> None:
+        self.bits = bits
+        self.trie = trie
+        self.prefix = prefix
+
+    @classmethod
+    def _from_iterable(cls, iterable: Iterable[str]) -> set[str]:
+        # Results of set operations (&, |, -, ...) are plain sets
+        return set(iterable)
+
+    def ids(self) -> Iterator[int]:
+        offset, _ = self.trie.get_word_id_range(self.prefix)
+        # Scanning the binary representation is linear in the size of the bitset
+        binary = bin(self.bits)[:1:-1]
+        i = binary.find("1")
+        while i != -1:
+            yield offset + i
+            i = binary.find("1", i + 1)
+
+    def __iter__(self) -> Iterator[str]:
+        words_by_id = self.trie.words_by_id
+        for word_id in self.ids():
+            yield words_by_id[word_id]
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __contains__(self, word: object) -> bool:
+        if not isinstance(word, str) or not word.startswith(self.prefix):
+            return False
+        words_by_id = self.trie.words_by_id
+        word_id = words_by_id.bisect_left(word)
+        if word_id == len(words_by_id) or words_by_id[word_id] != word:
+            return False
+        offset, _ = self.trie.get_word_id_range(self.prefix)
+        return bool(self.bits >> (word_id - offset) & 1)
+
+    def __repr__(self) -> str:
+        return repr(set(self))
+
+
+class PackedWords(Sequence, Set):
+    """
+    A set of words stored once, sorted and deduplicated, as one contiguous
+    UTF-8 buffer with an array of offsets into it: word i is the bytes from
+    offsets[i] to offsets[i + 1]. It is both a sorted sequence of str and
+    a set of str, decoding words only as they are accessed. Positions are
+    found with a binary search over the bytes (UTF-8 bytes sort in the same
+    order as the words), and membership with a hash table of word numbers
+    that is built when first needed.
+
+    Packed words can be written to a file and memory-mapped back, in which
+    case the words are only read from disk as they are accessed.
+
+    Added and removed words are kept in an overlay beside the buffer (the
+    added words, and the numbers of the removed packed words) and only
+    merged into a new buffer once the overlay holds more than 1/64 of the
+    words, so an edit takes amortized constant time however many words
+    there are (besides its searches).
+    """
+
+    # Magic, version, number of words, all padded to keep the offsets aligned
+    _HEADER = struct.Struct("=8sHxxxxxxq")
+    # The overlay is merged once it holds this many edits (or 1/64 of the
+    # packed words, if more)
+    _MIN_MERGE_SIZE = 1024
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        sorted_words = list(sorted(set(words)))
+        self._buffer: bytes | mmap.mmap = "".join(sorted_words).encode()
+        # Where the words start in the buffer
+        self._base = 0
+        if len(self._buffer) == sum(map(len, sorted_words)):  # All ASCII
+            lengths = map(len, sorted_words)
+        else:
+            lengths = (len(word.encode()) for word in sorted_words)
+        self._offsets: array.array | memoryview = array.array(
+            "q", itertools.accumulate(lengths, initial=0)
+        )
+        self._clear_overlay()
+
+    def _clear_overlay(self) -> None:
+        # The words added since the buffer was packed (sorted), and for each,
+        # the number of packed words before it
+        self._added: list[str] = []
+        self._added_positions: list[int] = []
+        # The numbers of the packed words removed since then (sorted)
+        self._removed: list[int] = []
+        # A hash table of packed word numbers (-1 where empty), built
+        # when first needed (see _lookup)
+        self._slots: array.array | None = None
+
+    @classmethod
+    def _from_iterable(cls, iterable: Iterable[str]) -> set[str]:
+        # Results of set operations (&, |, -, ...) are plain sets
+        return set(iterable)
+
+    @classmethod
+    def read(cls, path: str) -> "PackedWords":
+        """
+        Memory-map packed words written by write.
+        """
+        with open(path, "rb") as file:
+            # The map stays open (independently of the file) while it is in use
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_words = cls._HEADER.unpack_from(buffer)
+        if magic.rstrip(b"\0") != PACKED_WORDS_MAGIC:
+            raise Exception(f"{path} is not a packed word file!")
+        if version != PACKED_WORDS_VERSION:
+            raise Exception(f"unsupported packed word file version {version}!")
+        offsets_end = cls._HEADER.size + 8 * (num_words + 1)
+        words = cls.__new__(cls)
+        words._offsets = memoryview(buffer)[cls._HEADER.size : offsets_end].cast("q")
+        words._buffer = buffer
+        words._base = offsets_end
+        words._clear_overlay()
+        return words
+
+    def write(self, path: str) -> None:
+        """
+        Write the packed words to path, to be memory-mapped by read.
+        (Offsets are written in this machine's byte order.)
+        """
+        if self._added or self._removed:
+            self._merge()
+        with open(path, "wb") as file:
+            file.write(
+                self._HEADER.pack(PACKED_WORDS_MAGIC, PACKED_WORDS_VERSION, len(self))
+            )
+            file.write(self._offsets)
+            file.write(self._buffer[self._base :])
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the size of the buffer, offsets and hash table in bytes
+        (not counting words added since the buffer was packed)
+        """
+        num_bytes = len(self._buffer) - self._base + 8 * len(self._offsets)
+        if self._slots is not None:
+            num_bytes += self._slots.itemsize * len(self._slots)
+        return num_bytes
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1 - len(self._removed) + len(self._added)
+
+    def _decode(self, i: int) -> str:
+        start = self._base + self._offsets[i]
+        return str(self._buffer[start : self._base + self._offsets[i + 1]], "utf-8")
+
+    def _get(self, i: int) -> str:
+        """
+        Returns word i, counting the overlay.
+        """
+        if not (self._added or self._removed):
+            return self._decode(i)
+        removed = self._removed
+        positions = self._added_positions
+
+        def get_added_position(k: int) -> int:
+            return positions[k] - bisect.bisect_left(removed, positions[k]) + k
+
+        # The added words before position i, and whether word i is one of them
+        k = bisect.bisect_left(range(len(positions)), i, key=get_added_position)
+        if k < len(positions) and get_added_position(k) == i:
+            return self._added[k]
+        # Otherwise it is the (i - k)-th packed word that was not removed
+        rank = i - k
+        j = rank
+        while (next_j := rank + bisect.bisect_right(removed, j)) != j:
+            j = next_j
+        return self._decode(j)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("word index out of range")
+        return self._get(i)
+
+    def _iter_packed(self) -> Iterator[str]:
+        buffer = self._buffer
+        base = self._base
+        for start, end in itertools.pairwise(self._offsets):
+            yield str(buffer[base + start : base + end], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        if not (self._added or self._removed):
+            return self._iter_packed()
+        removed = set(self._removed)
+        packed = (
+            word for i, word in enumerate(self._iter_packed()) if i not in removed
+        )
+        return heapq.merge(packed, self._added)
+
+    def _bisect_packed(self, encoded: bytes, low: int = 0, high: int = -1) -> int:
+        """
+        Returns the number of packed words (ignoring the overlay) before
+        encoded, searching only from low up to high (-1 for the end).
+        """
+        # Compare encoded bytes rather than decoding a word at every step
+        buffer = self._buffer
+        base = self._base
+        offsets = self._offsets
+        if high < 0:
+            high = len(offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if buffer[base + offsets[middle] : base + offsets[middle + 1]] < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _is_packed(self, i: int, encoded: bytes) -> bool:
+        """
+        Returns whether packed word i is encoded (ignoring the overlay).
+        """
+        if i >= len(self._offsets) - 1:
+            return False
+        start = self._base + self._offsets[i]
+        return self._buffer[start : self._base + self._offsets[i + 1]] == encoded
+
+    def _is_removed(self, i: int) -> bool:
+        j = bisect.bisect_left(self._removed, i)
+        return j < len(self._removed) and self._removed[j] == i
+
+    def _get_added_index(self, word: str) -> tuple[int, bool]:
+        k = bisect.bisect_left(self._added, word)
+        return k, k < len(self._added) and self._added[k] == word
+
+    def bisect_left(self, word: str, lo: int = 0, hi: int | None = None) -> int:
+        """
+        Returns where word is (or would be inserted) in the sorted words,
+        searching only from lo up to hi, as bisect.bisect_left does but
+        comparing encoded words rather than decoding them.
+        """
+        if not (self._added or self._removed):
+            return self._bisect_packed(word.encode(), lo, -1 if hi is None else hi)
+        i = self._bisect_packed(word.encode())
+        position = (
+            i
+            - bisect.bisect_left(self._removed, i)
+            + bisect.bisect_left(self._added, word)
+        )
+        return min(max(position, lo), len(self) if hi is None else hi)
+
+    def _find(self, word: str) -> tuple[int, bool]:
+        """
+        Returns where word is (or would be) in the sequence, and whether it is there.
+        """
+        encoded = word.encode()
+        i = self._bisect_packed(encoded)
+        is_present = self._is_packed(i, encoded) and not self._is_removed(i)
+        k, is_added = self._get_added_index(word)
+        return i - bisect.bisect_left(self._removed, i) + k, is_present or is_added
+
+    def _build_slots(self) -> array.array:
+        """
+        Returns a hash table of the packed word numbers, with linear probing.
+        """
+        buffer = self._buffer
+        base = self._base
+        # A power of two with at least a third of the slots empty
+        size = 1 << (3 * len(self._offsets) // 2).bit_length()
+        slots = array.array("q", [-1]) * size
+        for i, (start, end) in enumerate(itertools.pairwise(self._offsets)):
+            slot = hash(buffer[base + start : base + end]) & (size - 1)
+            while slots[slot] != -1:
+                slot = (slot + 1) & (size - 1)
+            slots[slot] = i
+        return slots
+
+    def _lookup(self, encoded: bytes) -> int:
+        """
+        Returns the number of the packed word encoded (ignoring the overlay),
+        or -1 if it is not packed, with a lookup in the hash table.
+        """
+        if self._slots is None:
+            self._slots = self._build_slots()
+        buffer = self._buffer
+        base = self._base
+        offsets = self._offsets
+        slots = self._slots
+        mask = len(slots) - 1
+        slot = hash(encoded) & mask
+        while (i := slots[slot]) != -1:
+            if buffer[base + offsets[i] : base + offsets[i + 1]] == encoded:
+                return i
+            slot = (slot + 1) & mask
+        return -1
+
+    def __contains__(self, word: object) -> bool:
+        if not isinstance(word, str):
+            return False
+        if self._added and self._get_added_index(word)[1]:
+            return True
+        i = self._lookup(word.encode())
+        return i != -1 and not (self._removed and self._is_removed(i))
+
+    def index(self, word: str, start: int = 0, stop: int | None = None) -> int:
+        i, is_present = self._find(word)
+        if not is_present or i < start or (stop is not None and i >= stop):
+            raise ValueError(f"{word} is not in the words")
+        return i
+
+    def count(self, word: str) -> int:
+        return int(word in self)
+
+    def __repr__(self) -> str:
+        return f"PackedWords({len(self)} words, {self.nbytes} bytes)"
+
+    def add(self, word: str) -> None:
+        encoded = word.encode()
+        i = self._bisect_packed(encoded)
+        if self._is_packed(i, encoded):
+            if self._is_removed(i):
+                self._removed.remove(i)
+            return
+        k, is_added = self._get_added_index(word)
+        if not is_added:
+            self._added.insert(k, word)
+            self._added_positions.insert(k, i)
+            self._merge_if_full()
+
+    def remove(self, word: str) -> None:
+        k, is_added = self._get_added_index(word)
+        if is_added:
+            del self._added[k]
+            del self._added_positions[k]
+            return
+        encoded = word.encode()
+        i = self._bisect_packed(encoded)
+        if not self._is_packed(i, encoded) or self._is_removed(i):
+            raise KeyError(word)
+        bisect.insort(self._removed, i)
+        self._merge_if_full()
+
+    def discard(self, word: str) -> None:
+        if word in self:
+            self.remove(word)
+
+    def _merge_if_full(self) -> None:
+        num_edits = len(self._added) + len(self._removed)
+        if num_edits >= max(self._MIN_MERGE_SIZE, (len(self._offsets) - 1) // 64):
+            self._merge()
+
+    def _merge(self) -> None:
+        """
+        Pack the words (including the overlay) into a new buffer,
+        copying the unchanged runs of packed words whole.
+        """
+        packed_buffer = self._buffer
+        base = self._base
+        packed_offsets = self._offsets
+        buffer = bytearray()
+        offsets = array.array("q", [0])
+
+        def copy_packed(start: int, end: int) -> None:
+            # Copy packed words start up to end, moving their offsets along
+            if start < end:
+                shift = len(buffer) - packed_offsets[start]
+                buffer.extend(
+                    packed_buffer[
+                        base + packed_offsets[start] : base + packed_offsets[end]
+                    ]
+                )
+                offsets.extend(
+                    offset + shift for offset in packed_offsets[start + 1 : end + 1]
+                )
+
+        # Each added word goes before the packed word at its position
+        edits = list(zip(self._added_positions, itertools.repeat(False), self._added))
+        edits += zip(self._removed, itertools.repeat(True), itertools.repeat(""))
+        start = 0
+        for position, is_removal, word in sorted(edits):
+            copy_packed(start, position)
+            if is_removal:
+                start = position + 1
+            else:
+                buffer.extend(word.encode())
+                offsets.append(len(buffer))
+                start = position
+        copy_packed(start, len(packed_offsets) - 1)
+        self._buffer = bytes(buffer)
+        self._base = 0
+        self._offsets = offsets
+        self._clear_overlay()
+
+
+class _UnknownCodeTable(dict):
+    """
+    A str.translate table that maps characters missing from it to code 0.
+    """
+
+    def __missing__(self, key: int) -> int:
+        return 0
+
+
+class Codebook:
+    """
+    Maps a lexicon's alphabet to small integer codes, numbered from 1 in
+    sorted character order (0 is left for padding and unknown characters),
+    so encoded words sort the same way as the words themselves.
+
+    Words are encoded as arrays of uint8 codes, or uint16 codes for alphabets
+    of more than 255 characters. With uint8 codes, words are converted with
+    str.translate tables (in C rather than letter by letter).
+    """
+
+    def __init__(self, characters: Iterable[str]) -> None:
+        self.characters = list(sorted(characters))
+        if len(self.characters) >= 2**16:
+            raise Exception("alphabet is too large for 16-bit codes!")
+        self.codes = {letter: i + 1 for i, letter in enumerate(self.characters)}
+        self.typecode = "B" if len(self.characters) < 2**8 else "H"
+        self._encode_table = _UnknownCodeTable(
+            (ord(letter), code) for letter, code in self.codes.items()
+        )
+        self._decode_table = {code: letter for letter, code in self.codes.items()}
+        self._decode_table[0] = None
+
+    def __len__(self) -> int:
+        return len(self.characters)
+
+    def _translate(self, string: str) -> array.array:
+        if self.typecode == "B":
+            translated = string.translate(self._encode_table)
+            return array.array("B", translated.encode("latin-1"))
+        return array.array("H", [self._encode_table[ord(letter)] for letter in string])
+
+    def encode(self, word: str) -> array.array:
+        """
+        Returns the codes for word's letters.
+        """
+        return self._translate(word)
+
+    def encode_aligned(self, words: Iterable[str], length: int) -> array.array:
+        """
+        Returns the codes for the last length letters of each word, right-aligned
+        and left-padded with 0, concatenated into a single array (so the codes
+        for the i-th word are at [i * length, (i + 1) * length)).
+        """
+        padding = "\0" * length
+        return self._translate(
+            "".join((padding + word)[len(word) :] for word in words)
+        )
+
+    def decode(self, codes: array.array) -> str:
+        """
+        Returns the word for codes, skipping padding (and unknown characters).
+        """
+        if self.typecode == "B":
+            return codes.tobytes().decode("latin-1").translate(self._decode_table)
+        characters = [""] + self.characters
+        return "".join([characters[code] for code in codes])
+
+
+class LexiconListener:
+    """
+    A base class for anything derived from a lexicon's trie that should be
+    updated (rather than recalculated) when words are added or removed.
+    See LanguageLexicon.add_listener.
+    """
+
+    def before_word_change(self, word: str) -> None:
+        """
+        Called before word is added to or removed from the trie
+        """
+        pass
+
+    def after_word_change(self, word: str) -> None:
+        """
+        Called after word is added to or removed from the trie
+        """
+        pass
+
+
 class LanguageLexicon:
     """
     A utility class for loading words from a given lexicon
     into different data structures for use by other objects.
     """
 
-    def __init__(self, words_or_path_to_words: str | Iterable[str]) -> None:
+    def __init__(
+        self,
+        words_or_path_to_words: str | Iterable[str],
+        backend: type[LexiconBackend] = Trie,
+    ) -> None:
         """
         :param words_or_path_to_words: a str representing the path to a lexicon
         or else an iterable of words (for ad hoc lexicons)
+        :param backend: the data structure to store the words in (see the trie property)
         """
-        self._trie: Trie | None = None
-        self._words = set()
+        self._backend = backend
+        self._trie: LexiconBackend | None = None
+        self._words: PackedWords | None = None  # None until loaded
+        self._character_counts: collections.Counter | None = None
+        self._codebook: Codebook | None = None
+        # Tries pruned for play, by minimum word length (see get_game_trie)
+        self._game_tries: dict[int, LexiconBackend] = dict()
+        # Minimum length -> the number of words of at least that length
+        # before each word ID (see count_completions_many)
+        self._length_counts: dict[int, array.array] = dict()
+        # The words decoded into a list, so batches of queries can be binary
+        # searched in C (see _answer_many)
+        self._decoded_words: list[str] | None = None
+        self._listeners: weakref.WeakSet[LexiconListener] = weakref.WeakSet()
         if isinstance(words_or_path_to_words, str):
-            self._words = set()
             self._path_to_words = words_or_path_to_words
         else:
-            self._words = set(words_or_path_to_words)
+            self._words = PackedWords(words_or_path_to_words)
             self._path_to_words = ""
 
     def __str__(self) -> str:
@@ -81,62 +1254,309 @@ class LanguageLexicon:
         else:
             return f"LanguageLexicon for unknown lexicon with {len(self.words)} words"
 
-    def get_words_from_file(self, filename: str, to_lower: bool = True) -> list[str]:
-        words = set()
+    def get_words_from_file(
+        self, filename: str, to_lower: bool = True
+    ) -> PackedWords:
+        if filename.endswith(COMPILED_TRIE_EXTENSION):
+            return self.trie.words_by_id
+        if filename.endswith(PACKED_WORDS_EXTENSION):
+            return PackedWords.read(filename)
         with open(filename) as file:
-            for line in file.readlines():
-                word = line.strip()
-                if to_lower:
-                    word = word.lower()
-                words.add(word)
-        return words
+            # Read line by line, so only the set of words is ever held in full
+            if to_lower:
+                words = {line.strip().lower() for line in file}
+            else:
+                words = {line.strip() for line in file}
+        return PackedWords(words)
 
     def load_words(self) -> None:
-        if self._words:
+        if self._words is not None:
             raise Exception("words already loaded!")
+        self._words = PackedWords()
         if self._path_to_words:
             self._words = self.get_words_from_file(self._path_to_words)
 
-    def load_trie(self) -> None:
+    def load_trie(self, num_workers: int = 1, shard_prefix_length: int = 1) -> None:
+        """
+        :param num_workers: if greater than 1, build the trie in parallel
+        with this many worker processes (see build_trie; Trie backend only)
+        :param shard_prefix_length: the length of the prefixes used to split
+        words between workers
+        """
         if self._trie:
             raise Exception("trie already loaded!")
 
-        self._trie = Trie()
+        if self._path_to_words.endswith(COMPILED_TRIE_EXTENSION):
+            trie = read_compiled_trie(self._path_to_words)
+            if self._backend is Trie:
+                self._trie = trie
+            else:
+                self._trie = self._backend.build(trie.words_by_id)
+            return
         words = self._words
-        if not words and self._path_to_words:
-            words = self.get_words_from_file(self._path_to_words)
+        if words is None and self._path_to_words:
+            # The backend shares the words (see LexiconBackend.build)
+            words = self._words = self.get_words_from_file(self._path_to_words)
+        if num_workers > 1 and self._backend is Trie:
+            self._trie = build_trie(words, num_workers, shard_prefix_length)
+            return
+        self._trie = self._backend.build(words)
+
+    def add_listener(self, listener: LexiconListener) -> None:
+        """
+        Register listener to be notified of each word added or removed.
+        Listeners are held weakly.
+        """
+        self._listeners.add(listener)
+
+    def add_words(self, words: Iterable[str]) -> None:
+        """
+        Add words to the lexicon, updating the trie (if loaded) and
+        any listeners in place.
+        """
         for word in words:
-            self._trie.insert(word)
+            if word not in self.words:
+                self._change_word(word, True)
+
+    def remove_words(self, words: Iterable[str]) -> None:
+        """
+        Remove words from the lexicon, updating the trie (if loaded),
+        pruning branches that no longer lead to words, and updating
+        any listeners in place.
+        """
+        for word in words:
+            if word in self.words:
+                self._change_word(word, False)
+
+    def _change_word(self, word: str, is_addition: bool) -> None:
+        # Listeners are derived from the trie, so there is nothing to update without it
+        listeners = list(self._listeners) if self._trie else []
+        for listener in listeners:
+            listener.before_word_change(word)
+        if is_addition:
+            self._words.add(word)
+        else:
+            self._words.remove(word)
+        if self._trie:
+            if is_addition:
+                self._trie.insert(word)
+            else:
+                self._trie.remove(word)
+            for min_word_length in list(self._game_tries):
+                self._update_game_trie(min_word_length, word)
+        self._length_counts.clear()
+        self._decoded_words = None
+        if self._character_counts is not None:
+            if is_addition:
+                self._character_counts.update(word)
+            else:
+                self._character_counts.subtract(word)
+            # Drop characters that no longer occur
+            self._character_counts = +self._character_counts
+            if self._codebook and set(self._codebook.codes) != set(
+                self._character_counts
+            ):
+                self._codebook = None  # The alphabet changed
+        for listener in listeners:
+            listener.after_word_change(word)
+
+    def _update_game_trie(self, min_word_length: int, word: str) -> None:
+        """
+        Update the game trie for min_word_length in place after word
+        was added to or removed from the trie.
+        """
+        # A word too short to be final only adds to or prunes prefixes of
+        # longer words, which leaves the same final words below it
+        if len(word) < min_word_length:
+            return
+        if not word:
+            # The empty word can only be final without a minimum length
+            del self._game_tries[min_word_length]  # Rebuilt when next needed
+            return
+        path = self._trie.get_path_nodes(word)
+        # A word below a final word never comes up in play
+        if any(node.is_leaf for node in path[min_word_length : len(word)]):
+            return
+        game_trie = self._game_tries[min_word_length]
+        if not isinstance(game_trie, Trie):
+            # Replace the final words below word one at a time
+            old_words = game_trie.get_sorted_words(word)
+            new_words = self._trie.get_all_words(
+                word, stop_at_leaf=True, min_length=min_word_length
+            )
+            for old_word in set(old_words).difference(new_words):
+                game_trie.remove(old_word)
+            for new_word in set(new_words).difference(old_words):
+                game_trie.insert(new_word)
+            return
+        node = self._trie.get_prefix_node(word)
+        game_node = node and _build_game_node(node, len(word), min_word_length)
+        if game_node:
+            game_trie.attach(word, game_node)
+        else:
+            game_trie.detach(word)
+
+    def get_game_trie(self, min_word_length: int) -> LexiconBackend:
+        """
+        Returns the lexicon's words pruned for play with min_word_length
+        (see build_game_trie). It is built when first needed, then kept
+        up to date as words are added or removed.
+        """
+        if min_word_length not in self._game_tries:
+            self._game_tries[min_word_length] = build_game_trie(
+                self.trie, min_word_length
+            )
+        return self._game_tries[min_word_length]
+
+    @property
+    def game_tries(self) -> dict[int, LexiconBackend]:
+        """
+        Returns the game tries built so far, by minimum word length
+        """
+        return dict(self._game_tries)
 
     @property
-    def trie(self) -> Trie:
+    def trie(self) -> LexiconBackend:
         """
-        Returns all words in the lexicon as a prefix trie
+        Returns all words in the lexicon in the lexicon's backend
+        (a prefix trie by default)
         """
         if not self._trie:
             self.load_trie()
         return self._trie
 
     @property
-    def words(self) -> set:
+    def words(self) -> PackedWords:
         """
-        Returns all words in the lexicon
+        Returns all words in the lexicon, which can be used as a set
+        or as a sorted sequence
         """
-        if not self._words:
+        if self._words is None:
             self.load_words()
         return self._words
 
     @property
-    @functools.cache
     def characters(self) -> set:
         """
         Returns the character set for the words in the lexicon
         """
-        all_characters = set()
-        for word in self.words:
-            for letter in word:
-                all_characters.add(letter)
-        return all_characters
+        if self._character_counts is None:
+            # Counting one joined string is much faster than a word at a time
+            self._character_counts = collections.Counter("".join(self.words))
+        return set(self._character_counts)
+
+    @property
+    def codebook(self) -> Codebook:
+        """
+        Returns the codebook mapping the lexicon's characters to integer codes.
+        It is rebuilt if words are added or removed that change the alphabet.
+        """
+        if self._codebook is None:
+            self._codebook = Codebook(self.characters)
+        return self._codebook
+
+    @staticmethod
+    def _as_query_list(queries: Iterable[str]) -> list[str]:
+        if numpy is not None and isinstance(queries, numpy.ndarray):
+            return queries.tolist()  # Python strs compare much faster
+        return queries if isinstance(queries, list) else list(queries)
+
+    @staticmethod
+    def _as_result(queries: Iterable[str], values: Iterable, typecode: str):
+        """
+        Returns values as a NumPy array if the queries were one,
+        or else as an array.array of typecode.
+        """
+        if numpy is not None and isinstance(queries, numpy.ndarray):
+            return numpy.fromiter(values, bool if typecode == "B" else numpy.int64)
+        return array.array(typecode, values)
+
+    def _get_decoded_words(self) -> list[str]:
+        # Decoding every word costs about as much as a few thousand queries,
+        # but bisecting a list in C is several times faster than bisecting
+        # the packed words in Python
+        if self._decoded_words is None:
+            self._decoded_words = list(self.trie.words_by_id)
+        return self._decoded_words
+
+    def _answer_many(
+        self, queries: Iterable[str], answer: Callable[[str, int], int], typecode: str
+    ):
+        """
+        Answer a batch of queries, where answer(query, position) answers
+        a query given where it is (or would be) in the sorted words.
+
+        Each distinct query is answered once, in sorted order, so each
+        binary search starts where the last one ended.
+        """
+        query_list = self._as_query_list(queries)
+        words = self._get_decoded_words()
+        answers = dict()
+        position = 0
+        for query in sorted(set(query_list)):
+            position = bisect.bisect_left(words, query, position)
+            answers[query] = answer(query, position)
+        return self._as_result(queries, map(answers.__getitem__, query_list), typecode)
+
+    def contains_many(self, words: Iterable[str]):
+        """
+        Returns whether each word is in the lexicon, as an array of 0/1
+        (or of bools if words is a NumPy array).
+        """
+        sorted_words = self._get_decoded_words()
+        num_words = len(sorted_words)
+
+        def contains(word: str, position: int) -> bool:
+            return position < num_words and sorted_words[position] == word
+
+        return self._answer_many(words, contains, "B")
+
+    def is_prefix_many(self, prefixes: Iterable[str]):
+        """
+        Returns whether some word starts with each prefix, as an array of 0/1
+        (or of bools if prefixes is a NumPy array).
+        """
+        sorted_words = self._get_decoded_words()
+        num_words = len(sorted_words)
+
+        def is_prefix(prefix: str, position: int) -> bool:
+            return not prefix or (
+                position < num_words and sorted_words[position].startswith(prefix)
+            )
+
+        return self._answer_many(prefixes, is_prefix, "B")
+
+    def _get_length_counts(self, min_length: int) -> array.array:
+        if min_length not in self._length_counts:
+            self._length_counts[min_length] = array.array(
+                "q",
+                itertools.accumulate(
+                    (len(word) >= min_length for word in self.trie.words_by_id),
+                    initial=0,
+                ),
+            )
+        return self._length_counts[min_length]
+
+    def count_completions_many(self, prefixes: Iterable[str], min_length: int = 0):
+        """
+        Returns the number of words of at least min_length letters starting
+        with each prefix, as an array of ints.
+        """
+        sorted_words = self._get_decoded_words()
+        length_counts = self._get_length_counts(min_length)
+
+        def count_completions(prefix: str, start: int) -> int:
+            end = bisect.bisect_left(sorted_words, prefix + chr(0x10FFFF), start)
+            return length_counts[end] - length_counts[start]
+
+        return self._answer_many(prefixes, count_completions, "q")
+
+
+# The available backends, by the names used on the command line
+LEXICON_BACKENDS: dict[str, type[LexiconBackend]] = {
+    "trie": Trie,
+    "sorted_array": SortedArrayBackend,
+}
 
 
 class LexiconIndex(abc.ABC):
@@ -165,3 +1585,59 @@ class LexiconTrieIndex(LexiconIndex):
     def __init__(self, lexicon: LanguageLexicon) -> None:
         super().__init__(lexicon)
         self.trie = self.lexicon.trie
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Lexicon Compiler",
+        description="Builds the trie (or packed words) for a lexicon and writes it to disk",
+    )
+    parser.add_argument(
+        "lexicon", help="Specify the file containing line-separated words"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=False,
+        help=f"The output path (defaults to the lexicon path with {COMPILED_TRIE_EXTENSION} or {PACKED_WORDS_EXTENSION})",
+        default=None,
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["trie", "words"],
+        required=False,
+        help="Write a compiled trie or packed words (to be memory-mapped)",
+        default="trie",
+    )
+    parser.add_argument(
+        "-j",
+        "--num_workers",
+        type=int,
+        required=False,
+        help="The number of worker processes",
+        default=None,
+    )
+    parser.add_argument(
+        "-p",
+        "--shard_prefix_length",
+        type=int,
+        required=False,
+        help="The length of the prefixes used to shard the lexicon",
+        default=1,
+    )
+    args = parser.parse_args()
+    extension = {"trie": COMPILED_TRIE_EXTENSION, "words": PACKED_WORDS_EXTENSION}[
+        args.format
+    ]
+    output = args.output or args.lexicon.rsplit(".", 1)[0] + extension
+    print("\nLoading lexicon ... ")
+    lexicon = LanguageLexicon(args.lexicon)
+    print("\nCompiling ...")
+    if args.format == "words":
+        lexicon.words.write(output)
+    else:
+        write_compiled_trie(
+            lexicon.words, output, args.num_workers, args.shard_prefix_length
+        )
+    print(f"\nWrote {output}")
@@ -0,0 +1,187 @@
+import argparse
+import time
+import tracemalloc
+from array import array
+from typing import Iterable
+
+from base_classes.lexicon import LanguageLexicon, gc_paused
+
+
+class SuffixAutomaton:
+    """
+    A (generalized) suffix automaton: the smallest automaton accepting every
+    substring of a set of words. Each state stands for a set of substrings
+    that occur in exactly the same places, so a string is a substring of some
+    word if and only if it can be walked from the initial state (0).
+
+    Each state also records the length of the longest word in which its
+    substrings occur, so we can ask whether a string is a substring of some
+    word of at least a given length.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.transitions: list[dict[str, int]] = [dict()]
+        self.links = array("i", [-1])
+        self.lengths = array("i", [0])
+        self.max_word_lengths = array("i", [0])
+        with gc_paused():
+            for word in words:
+                last = 0
+                for letter in word:
+                    last = self._extend(last, letter)
+                    # Every substring ending here occurs in word
+                    if self.max_word_lengths[last] < len(word):
+                        self.max_word_lengths[last] = len(word)
+        self._propagate_max_word_lengths()
+
+    def __len__(self) -> int:
+        return len(self.transitions)
+
+    def _add_state(self, length: int, link: int, transitions: dict[str, int]) -> int:
+        self.transitions.append(transitions)
+        self.links.append(link)
+        self.lengths.append(length)
+        self.max_word_lengths.append(0)
+        return len(self.transitions) - 1
+
+    def _clone(self, p: int, q: int, letter: str) -> int:
+        """
+        Split state q (reached from p by letter) so that the substrings
+        no longer than lengths[p] + 1 get their own state.
+        """
+        clone = self._add_state(
+            self.lengths[p] + 1, self.links[q], dict(self.transitions[q])
+        )
+        while p != -1 and self.transitions[p].get(letter) == q:
+            self.transitions[p][letter] = clone
+            p = self.links[p]
+        self.links[q] = clone
+        return clone
+
+    def _extend(self, last: int, letter: str) -> int:
+        """
+        Extend the automaton with letter following the state last
+        and return the state for the extended string.
+        """
+        q = self.transitions[last].get(letter)
+        if q is not None:
+            # The extended string already occurs (in another word)
+            if self.lengths[last] + 1 == self.lengths[q]:
+                return q
+            return self._clone(last, q, letter)
+        current = self._add_state(self.lengths[last] + 1, 0, dict())
+        p = last
+        while p != -1 and letter not in self.transitions[p]:
+            self.transitions[p][letter] = current
+            p = self.links[p]
+        if p != -1:
+            q = self.transitions[p][letter]
+            if self.lengths[p] + 1 == self.lengths[q]:
+                self.links[current] = q
+            else:
+                self.links[current] = self._clone(p, q, letter)
+        return current
+
+    def _propagate_max_word_lengths(self) -> None:
+        # A state's substrings occur wherever the substrings of the states
+        # linking to it occur, so propagate from longer states to shorter ones
+        for state in sorted(
+            range(1, len(self)), key=lambda state: self.lengths[state], reverse=True
+        ):
+            link = self.links[state]
+            if self.max_word_lengths[link] < self.max_word_lengths[state]:
+                self.max_word_lengths[link] = self.max_word_lengths[state]
+
+    def get_state(self, string: str) -> int | None:
+        """
+        Returns the state for string, or None if it is not a substring of any word.
+        """
+        state = 0
+        for letter in string:
+            state = self.transitions[state].get(letter)
+            if state is None:
+                return None
+        return state
+
+    def get_extensions(self, string: str, min_word_length: int = 0) -> list[str]:
+        """
+        Returns the letters c for which string + c is a substring of a word
+        of at least min_word_length letters.
+        """
+        state = self.get_state(string)
+        if state is None:
+            return []
+        return [
+            letter
+            for letter, next_state in self.transitions[state].items()
+            if self.max_word_lengths[next_state] >= min_word_length
+        ]
+
+
+class SubstringIndex:
+    """
+    Answers substring queries for a set of words, including which letters
+    can extend a string on either end, using suffix automata for the
+    words and for the reversed words.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        words = list(words)
+        self.automaton = SuffixAutomaton(words)
+        self.reversed_automaton = SuffixAutomaton(word[::-1] for word in words)
+
+    def is_substring(self, string: str, min_word_length: int = 0) -> bool:
+        """
+        Returns whether string is a substring of a word of at least min_word_length letters.
+        """
+        state = self.automaton.get_state(string)
+        return (
+            state is not None
+            and self.automaton.max_word_lengths[state] >= min_word_length
+        )
+
+    def get_right_extensions(self, string: str, min_word_length: int = 0) -> list[str]:
+        """
+        Returns the letters c for which string + c is a substring
+        of a word of at least min_word_length letters.
+        """
+        return self.automaton.get_extensions(string, min_word_length)
+
+    def get_left_extensions(self, string: str, min_word_length: int = 0) -> list[str]:
+        """
+        Returns the letters c for which c + string is a substring
+        of a word of at least min_word_length letters.
+        """
+        return self.reversed_automaton.get_extensions(string[::-1], min_word_length)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Substring Index Benchmark",
+        description="Reports the build time and memory of a lexicon's substring index",
+    )
+    parser.add_argument(
+        "lexicon", help="Specify the file containing line-separated words"
+    )
+    args = parser.parse_args()
+    print("\nLoading lexicon ... ")
+    words = LanguageLexicon(args.lexicon).words
+    print("\nBuilding ...")
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = SubstringIndex(words)
+    seconds = time.perf_counter() - start
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    num_states = len(index.automaton) + len(index.reversed_automaton)
+    num_transitions = sum(
+        len(transitions)
+        for automaton in [index.automaton, index.reversed_automaton]
+        for transitions in automaton.transitions
+    )
+    print(
+        f"{len(words)} words, {sum(len(word) for word in words)} letters: "
+        f"{num_states} states, {num_transitions} transitions, "
+        f"built in {seconds:.2f}s, {size / 2**20:.1f} MiB "
+        f"({peak / 2**20:.1f} MiB peak)"
+    )
@@ -1,6 +1,47 @@
+import bisect
+import gc
+import random
+import threading
+
 import pytest
 
-from .lexicon import LanguageLexicon
+from . import lexicon as lexicon_module
+from .lexicon import (
+    COMPILED_TRIE_EXTENSION,
+    LEXICON_BACKENDS,
+    PACKED_WORDS_EXTENSION,
+    Codebook,
+    LanguageLexicon,
+    PackedWords,
+    SortedArrayBackend,
+    Trie,
+    WordIdSet,
+    build_game_trie,
+    build_trie,
+    count_nodes,
+    gc_paused,
+    read_compiled_trie,
+    write_compiled_trie,
+)
+
+
+# Test that pauses overlapping across threads only re-enable the collector at the end
+def test_gc_paused_overlapping():
+    assert gc.isenabled()
+    inner_done = threading.Event()
+
+    def pause_briefly() -> None:
+        with gc_paused():
+            pass
+        inner_done.set()
+
+    with gc_paused():
+        thread = threading.Thread(target=pause_briefly)
+        thread.start()
+        thread.join()
+        assert inner_done.is_set()
+        assert not gc.isenabled()
+    assert gc.isenabled()
 
 
 # Test we can load a lexicon both with a file path or an iterable of words
@@ -51,3 +92,265 @@ def test_trie_get_all_words():
     assert lexicon.trie.get_all_words("apply") == ["apply"]
     assert lexicon.trie.get_all_words("apple") == ["apple", "applesauce"]
     assert lexicon.trie.get_all_words("appli") == ["application"]
+
+
+# Test that words are numbered in sorted order and that subtrees cover contiguous IDs
+def test_trie_word_ids():
+    words = ["apply", "apple", "application", "applesauce", "b"]
+    lexicon = LanguageLexicon(words)
+    assert list(lexicon.trie.words_by_id) == list(sorted(words))
+    assert lexicon.trie.get_prefix_node("appl").word_count == 4
+    assert lexicon.trie.get_word_id_range("apple") == (0, 2)
+    assert lexicon.trie.get_word_id_range("b") == (4, 5)
+    assert lexicon.trie.get_word_id_range("c") == (5, 5)
+    # Inserting a word renumbers the trie
+    lexicon.trie.insert("aardvark")
+    assert lexicon.trie.words_by_id[0] == "aardvark"
+    assert lexicon.trie.get_word_id_range("apply") == (4, 5)
+
+
+# Test that a WordIdSet behaves like the set of words it encodes
+def test_word_id_set():
+    words = ["apple", "applesauce", "application", "apply", "b"]
+    lexicon = LanguageLexicon(words)
+    # Bits 0, 1, and 2 are the words starting with "appl" with IDs 1, 2, and 3
+    word_set = WordIdSet(0b1110, lexicon.trie, "appl")
+    assert word_set == {"applesauce", "application", "apply"}
+    assert len(word_set) == 3
+    assert "apply" in word_set
+    assert "apple" not in word_set and "b" not in word_set
+    assert "zebra" not in word_set
+    assert not WordIdSet(0, lexicon.trie)
+
+
+# Test that adding and removing words updates the words, trie, and characters in place
+def test_add_and_remove_words():
+    for backend in LEXICON_BACKENDS.values():
+        lexicon = LanguageLexicon(["apple", "apply"], backend)
+        trie = lexicon.trie
+        assert lexicon.characters == set("aplye")
+        lexicon.add_words(["zeitgeist", "apple"])
+        assert lexicon.words == {"apple", "apply", "zeitgeist"}
+        assert lexicon.trie is trie
+        assert trie.get_prefix_node("zeitgeist").is_leaf
+        assert trie.root.word_count == 3
+        assert lexicon.characters == set("aplyezitgs")
+        lexicon.remove_words(["apply", "zeitgeist", "banana"])
+        assert lexicon.words == {"apple"}
+        assert list(trie.words_by_id) == ["apple"]
+        # Dead branches are pruned
+        assert not trie.get_prefix_node("z")
+        assert list(trie.get_prefix_node("appl").children) == ["e"]
+        assert lexicon.characters == set("aple")
+        lexicon.remove_words(["apple"])
+        assert not lexicon.words
+        assert not trie.root.children
+
+
+# Test that every backend answers prefix queries the same way as the Trie
+def test_backends_agree():
+    words = ["", "a", "ab", "apple", "applesauce", "application", "apply", "b", "banana"]
+    trie = Trie.build(words)
+    sorted_array = SortedArrayBackend.build(words)
+    for prefix in ["", "a", "ap", "appl", "apple", "applesauce", "b", "c", "applx"]:
+        for backend in [trie, sorted_array]:
+            assert backend.get_sorted_words(prefix) == trie.get_sorted_words(prefix)
+            for stop_at_leaf in [False, True]:
+                assert sorted(
+                    backend.get_all_words(prefix, stop_at_leaf, min_length=4)
+                ) == sorted(trie.get_all_words(prefix, stop_at_leaf, min_length=4))
+        node = trie.get_prefix_node(prefix)
+        sorted_array_node = sorted_array.get_prefix_node(prefix)
+        if node is None:
+            assert sorted_array_node is None
+            continue
+        assert sorted_array_node.is_leaf == node.is_leaf
+        assert sorted_array_node.word_count == node.word_count
+        assert list(sorted_array_node.children) == list(sorted(node.children))
+        assert len(sorted_array.get_path_nodes(prefix)) == len(
+            trie.get_path_nodes(prefix)
+        )
+    # Nodes are views, compared by prefix
+    assert sorted_array.get_prefix_node("app") == sorted_array.root.children[
+        "a"
+    ].children["p"].children["p"]
+
+
+# Test that the game trie keeps only the final words and what leads to them
+def test_game_trie():
+    words = ["", "a", "ab", "abc", "apple", "applesauce", "apply", "ax", "b", "banana"]
+    for backend in LEXICON_BACKENDS.values():
+        lexicon = LanguageLexicon(words, backend)
+        game_trie = lexicon.get_game_trie(4)
+        assert lexicon.get_game_trie(4) is game_trie
+        assert isinstance(game_trie, backend)
+        assert list(game_trie.words_by_id) == ["apple", "apply", "banana"]
+        assert not game_trie.get_prefix_node("apple").children
+        # "ab" and "ax" only lead to words too short to end the game
+        assert list(game_trie.get_prefix_node("a").children) == ["p"]
+        assert not game_trie.get_prefix_node("b").is_leaf
+        assert count_nodes(game_trie.root) == 13
+        assert count_nodes(lexicon.trie.root) > 13
+
+        # Game tries are updated in place, as if rebuilt
+        lexicon.add_words(["appl", "axes", "abcdefg"])
+        assert lexicon.get_game_trie(4) is game_trie
+        assert list(game_trie.words_by_id) == ["abcdefg", "appl", "axes", "banana"]
+        lexicon.remove_words(["appl", "abcdefg", "banana", "b"])
+        assert list(game_trie.words_by_id) == ["apple", "apply", "axes"]
+        assert not game_trie.get_prefix_node("b")
+        for min_word_length in range(6):
+            assert sorted(
+                lexicon.get_game_trie(min_word_length).words_by_id
+            ) == sorted(lexicon.trie.get_all_words("", True, min_word_length))
+        lexicon.remove_words(list(lexicon.words))
+        assert not game_trie.root.children
+        assert not build_game_trie(lexicon.trie, 4).root.children
+
+
+# Test that batched queries answer as the backends do one at a time
+def test_batched_queries():
+    words = ["", "a", "ab", "apple", "applesauce", "application", "apply", "banana"]
+    queries = ["", "a", "ap", "appl", "apple", "applx", "b", "c", "zz", "a", "apple"]
+    for backend in LEXICON_BACKENDS.values():
+        lexicon = LanguageLexicon(words, backend)
+        trie = lexicon.trie
+        assert list(lexicon.contains_many(queries)) == [
+            query in lexicon.words for query in queries
+        ]
+        assert list(lexicon.is_prefix_many(queries)) == [
+            trie.get_prefix_node(query) is not None for query in queries
+        ]
+        for min_length in [0, 2, 5]:
+            assert list(lexicon.count_completions_many(queries, min_length)) == [
+                len(trie.get_all_words(query, min_length=min_length))
+                for query in queries
+            ]
+        lexicon.add_words(["applz"])
+        counts = lexicon.count_completions_many(iter(["appl", "x"]), 5)
+        assert list(counts) == [5, 0]
+        assert not lexicon.contains_many([])
+
+
+def test_batched_queries_numpy():
+    numpy = pytest.importorskip("numpy")
+    lexicon = LanguageLexicon(["apple", "apply", "banana"])
+    queries = numpy.array(["apple", "app", "b", "c"])
+    assert lexicon.contains_many(queries).tolist() == [True, False, False, False]
+    assert lexicon.is_prefix_many(queries).tolist() == [True, True, True, False]
+    assert lexicon.count_completions_many(queries, 5).tolist() == [1, 2, 1, 0]
+
+
+# Test that codes are small, preserve word order, and follow the lexicon's alphabet
+def test_codebook():
+    lexicon = LanguageLexicon(["año", "ano", "anö", "bebé", "zz"])
+    codebook = lexicon.codebook
+    assert codebook.typecode == "B"
+    # Codes follow character order, so "ñ" comes after "z"
+    assert list(codebook.encode("año")) == [1, 8, 5]
+    assert sorted(lexicon.words) == sorted(
+        lexicon.words, key=lambda word: codebook.encode(word).tobytes()
+    )
+    for word in lexicon.words:
+        assert codebook.decode(codebook.encode(word)) == word
+    # Unknown characters have code 0, like padding
+    assert list(codebook.encode("aqb")) == [1, 0, 2]
+    assert list(codebook.encode_aligned(["zz", "bebé", ""], 3)) == [
+        0, 6, 6, 3, 2, 7, 0, 0, 0
+    ]
+    assert lexicon.codebook is codebook
+    lexicon.add_words(["abba"])
+    assert lexicon.codebook is codebook
+    lexicon.remove_words(["zz"])
+    assert "z" not in lexicon.codebook.codes
+    # Alphabets of more than 255 characters need 16-bit codes
+    wide_codebook = Codebook(chr(0x4E00 + i) for i in range(300))
+    assert wide_codebook.typecode == "H"
+    word = chr(0x4E00) + chr(0x4E00 + 299)
+    assert list(wide_codebook.encode(word)) == [1, 300]
+    assert wide_codebook.decode(wide_codebook.encode(word)) == word
+
+
+# Test that building a trie in parallel shards yields the same words as building it directly
+def test_build_trie_parallel(monkeypatch):
+    words = ["", "a", "ab", "apple", "applesauce", "application", "b", "banana"]
+    # Use worker processes even on a machine with one CPU
+    monkeypatch.setattr(lexicon_module, "_get_num_cpus", lambda: 2)
+    for shard_prefix_length in [1, 2, 3]:
+        trie = build_trie(words, 2, shard_prefix_length)
+        assert list(trie.words_by_id) == list(sorted(words))
+        assert trie.get_prefix_node("appl").children.keys() == {"e", "i"}
+        assert trie.get_prefix_node("appl").word_count == 3
+    assert list(build_trie(words, 1).words_by_id) == list(sorted(words))
+
+
+# Test that a compiled trie round trips through disk and loads as a lexicon
+def test_compiled_trie(tmp_path):
+    words = ["apple", "applesauce", "application", "apply", "b"]
+    path = str(tmp_path / f"test{COMPILED_TRIE_EXTENSION}")
+    write_compiled_trie(words, path, 2)
+    trie = read_compiled_trie(path)
+    assert list(trie.words_by_id) == list(sorted(words))
+    assert trie.root.word_count == 5
+    assert trie.get_prefix_node("appl").word_count == 4
+    assert trie.get_prefix_node("apple").is_leaf
+    assert LanguageLexicon(path).words == set(words)
+
+
+# Test that packed words behave as a sorted sequence and a set, in memory and mapped
+def test_packed_words(tmp_path):
+    words = ["apply", "apple", "", "zèbre", "apple", "été", "b"]
+    packed = PackedWords(words)
+    assert list(packed) == list(sorted(set(words)))
+    assert len(packed) == 6
+    # Accented letters sort after z
+    assert packed[0] == "" and packed[-1] == "été"
+    assert packed[1:3] == ["apple", "apply"]
+    assert packed == set(words) and "été" in packed and "ét" not in packed
+    assert packed.index("b") == 3
+    with pytest.raises(ValueError):
+        packed.index("c")
+    assert packed & {"b", "c"} == {"b"}
+
+    path = str(tmp_path / f"test{PACKED_WORDS_EXTENSION}")
+    packed.write(path)
+    mapped = PackedWords.read(path)
+    assert list(mapped) == list(packed) and mapped[4] == "zèbre"
+    lexicon = LanguageLexicon(path)
+    assert lexicon.words == set(words)
+    assert list(lexicon.trie.words_by_id) == list(packed)
+    # The backend numbers the lexicon's own words rather than a copy
+    assert lexicon.trie.words_by_id is lexicon.words
+    # Changing mapped words leaves the file as it is
+    lexicon.add_words(["été2", "a"])
+    lexicon.remove_words(["", "zèbre"])
+    assert list(lexicon.words) == ["a", "apple", "apply", "b", "été", "été2"]
+    assert list(PackedWords.read(path)) == list(packed)
+    with pytest.raises(KeyError):
+        lexicon.words.remove("zèbre")
+
+
+# Test that edits kept beside the packed words read the same as once merged in
+def test_packed_words_edits(monkeypatch):
+    monkeypatch.setattr(PackedWords, "_MIN_MERGE_SIZE", 8)
+    rng = random.Random(0)
+    words = {"".join(rng.choices("abé", k=rng.randint(0, 4))) for _ in range(20)}
+    packed = PackedWords(words)
+    for _ in range(200):
+        word = "".join(rng.choices("abé", k=rng.randint(0, 4)))
+        if word in words:
+            packed.remove(word)
+            words.remove(word)
+        else:
+            packed.add(word)
+            words.add(word)
+        sorted_words = list(sorted(words))
+        assert list(packed) == sorted_words
+        assert packed[:] == sorted_words and len(packed) == len(words)
+        for query in ["", "a", "ab", "bé", "ééé", "c"]:
+            assert (query in packed) == (query in words)
+            assert packed.bisect_left(query) == bisect.bisect_left(sorted_words, query)
+            middle = len(words) // 2
+            assert packed.bisect_left(query, middle) == bisect.bisect_left(
+                sorted_words, query, middle
+            )
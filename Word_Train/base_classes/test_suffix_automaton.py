@@ -0,0 +1,31 @@
+from .suffix_automaton import SubstringIndex, SuffixAutomaton
+
+
+# Test every substring, and only substrings, are accepted
+def test_suffix_automaton_substrings():
+    words = ["banana", "bandana", "ananas", "nab"]
+    automaton = SuffixAutomaton(words)
+    substrings = {
+        word[start:end]
+        for word in words
+        for start in range(len(word))
+        for end in range(start + 1, len(word) + 1)
+    }
+    for substring in substrings:
+        assert automaton.get_state(substring) is not None
+    for string in ["bb", "nad", "bananas", "dan a", "x"]:
+        assert automaton.get_state(string) is None
+    assert automaton.get_state("") == 0
+
+
+# Test extensions on either end respect the minimum word length
+def test_substring_index_extensions():
+    index = SubstringIndex(["apple", "grapple", "pal"])
+    assert sorted(index.get_right_extensions("ppl")) == ["e"]
+    assert sorted(index.get_left_extensions("ppl")) == ["a"]
+    assert sorted(index.get_left_extensions("appl")) == ["r"]
+    assert sorted(index.get_right_extensions("pa")) == ["l"]
+    assert index.get_right_extensions("pa", 4) == []
+    assert index.is_substring("rap", 7)
+    assert not index.is_substring("pal", 4)
+    assert not index.is_substring("lap")
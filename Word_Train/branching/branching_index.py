@@ -2,10 +2,65 @@ import argparse
 import dataclasses
 import random
 
-from base_classes.lexicon import LanguageLexicon, LexiconIndexType, LexiconTrieIndex
+from base_classes.lexicon import (
+    LanguageLexicon,
+    LexiconIndexType,
+    LexiconListener,
+    LexiconTrieIndex,
+    TrieNode,
+)
 
 
-class BinaryBranchingIndex(LexiconTrieIndex):
+class BranchingIndex(LexiconTrieIndex, LexiconListener):
+    """
+    An abstract class for indices that average some count of "branchings"
+    over all prefixes (trie nodes) in a lexicon.
+
+    The totals are kept up to date as words are added to or removed from
+    the lexicon: only the nodes on a changed word's path can change, so we
+    subtract their contributions before the change and add them back after.
+    """
+
+    def __init__(self, lexicon: LanguageLexicon) -> None:
+        super().__init__(lexicon)
+        self.branchings: int | None = None  # None until first calculated
+        self.prefixes = 0
+        self._changing_path_totals = (0, 0)
+        lexicon.add_listener(self)
+
+    def count_branchings(self, node: TrieNode) -> int:
+        raise NotImplementedError()
+
+    def _get_path_totals(self, word: str) -> tuple[int, int]:
+        nodes = self.trie.get_path_nodes(word)
+        return sum(self.count_branchings(node) for node in nodes), len(nodes)
+
+    def before_word_change(self, word: str) -> None:
+        if self.branchings is not None:
+            self._changing_path_totals = self._get_path_totals(word)
+
+    def after_word_change(self, word: str) -> None:
+        if self.branchings is not None:
+            branchings, prefixes = self._get_path_totals(word)
+            old_branchings, old_prefixes = self._changing_path_totals
+            self.branchings += branchings - old_branchings
+            self.prefixes += prefixes - old_prefixes
+
+    def calculate(self):
+        if self.branchings is None:
+            trie_node_stack = [self.trie.root]
+            self.branchings = 0
+            self.prefixes = 0
+            # We conduct a DFS over all prefixes
+            while trie_node_stack:
+                node = trie_node_stack.pop()
+                self.prefixes += 1
+                self.branchings += self.count_branchings(node)
+                trie_node_stack += [node for node in node.children.values()]
+        return self.branchings / self.prefixes if self.prefixes else 0
+
+
+class BinaryBranchingIndex(BranchingIndex):
     """
     A class to calculate the "binary branching index," a measure
     of how often a given prefix string in a lexicon has more than one
@@ -19,24 +74,14 @@ class BinaryBranchingIndex(LexiconTrieIndex):
     The average branching over all prefixes is thus 1/6.
     """
 
-    def calculate(self):
-        trie_node_stack = [self.trie.root]
-        binary_branchings = 0
-        total_prefixes = 0
-        # We conduct a DFS over all prefixes
-        while trie_node_stack:
-            node = trie_node_stack.pop()
-            total_prefixes += 1
-            # The is_leaf check ensures we count the null string
-            # as a branching option when applicable (since a node
-            # can be a leaf--i.e., a word end--but also the prefix of another word).
-            if len(node.children) > (0 if node.is_leaf else 1):
-                binary_branchings += 1
-            trie_node_stack += [node for node in node.children.values()]
-        return binary_branchings / total_prefixes if total_prefixes else 0
-
-
-class TotalBranchingIndex(LexiconTrieIndex):
+    def count_branchings(self, node: TrieNode) -> int:
+        # The is_leaf check ensures we count the null string
+        # as a branching option when applicable (since a node
+        # can be a leaf--i.e., a word end--but also the prefix of another word).
+        return int(len(node.children) > (0 if node.is_leaf else 1))
+
+
+class TotalBranchingIndex(BranchingIndex):
     """
     A class to calculate the "total branching index," a measure
     of how many degrees of freedom, on average, a prefix string in
@@ -54,24 +99,13 @@ class TotalBranchingIndex(LexiconTrieIndex):
     The average branching over all prefixes is thus (2+1)/8 = 3/8.
     """
 
-    def calculate(self):
-        trie_node_stack = [self.trie.root]
-        total_branchings = 0
-        total_prefixes = 0
-        # We conduct a DFS over all prefixes
-        while trie_node_stack:
-            node = trie_node_stack.pop()
-            total_prefixes += 1
-            # The is_leaf check ensures we count the null string
-            # as a branching option when applicable (since a node
-            # can be a leaf--i.e., a word end--but also the prefix of another word).
-            # The degrees of freedom will be the number of options - 1 unless this is negative
-            # (since negative degrees of freedom is nonsense in this context).
-            total_branchings += max(
-                len(node.children) if node.is_leaf else len(node.children) - 1, 0
-            )
-            trie_node_stack += [node for node in node.children.values()]
-        return total_branchings / total_prefixes if total_prefixes else 0
+    def count_branchings(self, node: TrieNode) -> int:
+        # The is_leaf check ensures we count the null string
+        # as a branching option when applicable (since a node
+        # can be a leaf--i.e., a word end--but also the prefix of another word).
+        # The degrees of freedom will be the number of options - 1 unless this is negative
+        # (since negative degrees of freedom is nonsense in this context).
+        return max(len(node.children) if node.is_leaf else len(node.children) - 1, 0)
 
 
 class FakeLexiconMaker:
@@ -126,23 +160,35 @@ class LexiconIndexCalculator:
         )
 
     def calculate_index_from_samples(
-        self, lexicon: LanguageLexicon, num_samples: int, sample_size: int | float
+        self,
+        lexicon: LanguageLexicon,
+        num_samples: int,
+        sample_size: int | float,
+        rng: random.Random | None = None,
     ):
         if isinstance(sample_size, float):
             if sample_size <= 0 or sample_size >= 1:
                 raise Exception("expected 0 < sample_size (float) < 1")
             sample_size = int(sample_size * len(lexicon.words))
-        return self._calculate_index_from_samples(lexicon, num_samples, sample_size)
+        return self._calculate_index_from_samples(
+            lexicon, num_samples, sample_size, rng or random
+        )
 
     def _calculate_index_from_samples(
-        self, lexicon: LanguageLexicon, num_samples: int, sample_size: int
+        self,
+        lexicon: LanguageLexicon,
+        num_samples: int,
+        sample_size: int,
+        rng: random.Random,
     ) -> LexiconIndexResult:
         if len(lexicon.words) <= sample_size:
             raise Exception(f"sample_size is too high for {lexicon}")
         total = 0
         indices = [0] * num_samples
+        # Sort so that a seeded rng draws the same samples however the words were loaded
+        all_words = list(sorted(lexicon.words))
         for i in range(num_samples):
-            words = random.sample(list(lexicon.words), sample_size)
+            words = rng.sample(all_words, sample_size)
             custom_dict = LanguageLexicon(words)
             index = self.index(custom_dict).calculate()
             indices[i] = index
@@ -154,6 +200,16 @@ class LexiconIndexCalculator:
         return LexiconIndexCalculator.LexiconIndexResult(mean, variance, variance**0.5)
 
 
+def parse_sample_size(sample_size: str) -> int | float:
+    """
+    Parse a sample size: a fraction of the words (float) or a number of words (int).
+    """
+    sample_size = float(sample_size)
+    if int(sample_size) == sample_size:
+        return int(sample_size)
+    return sample_size
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         prog="Branching Index Calculator",
@@ -177,6 +233,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-s",
         "--sample_size",
+        type=parse_sample_size,
         help="Specify the sample size to be used if num_samples is specified",
         default=0.25,
     )
@@ -191,11 +248,8 @@ if __name__ == "__main__":
     print("\nSolving ...")
     for index_name, calculator in indices:
         if args.num_samples:
-            sample_size = float(args.sample_size)
-            if int(sample_size) == sample_size:
-                sample_size = int(sample_size)
             index = calculator.calculate_index_from_samples(
-                lexicon, int(args.num_samples), sample_size
+                lexicon, int(args.num_samples), args.sample_size
             )
             print(f"{index_name} {index}")
         else:
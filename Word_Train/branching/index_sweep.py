@@ -0,0 +1,304 @@
+import argparse
+import dataclasses
+import glob
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
+from base_classes.lexicon import LanguageLexicon
+from branching.branching_index import (
+    BinaryBranchingIndex,
+    LexiconIndexCalculator,
+    TotalBranchingIndex,
+    parse_sample_size,
+)
+
+
+INDEX_TYPES = {"b": BinaryBranchingIndex, "t": TotalBranchingIndex}
+DEFAULT_CACHE_DIRECTORY = "./.index_cache"
+# Bump this whenever the way indices are calculated changes, so that
+# previously cached results are no longer used
+CACHE_VERSION = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class SweepConfiguration:
+    """
+    One lexicon × index × sampling combination.
+    num_samples is None to calculate the index over the entire lexicon.
+    """
+
+    lexicon_path: str
+    index_type: str
+    num_samples: int | None = None
+    sample_size: int | float | None = None
+    seed: int = 0
+
+
+@dataclasses.dataclass
+class SweepResult:
+    configuration: SweepConfiguration
+    result: LexiconIndexCalculator.LexiconIndexResult | None
+    # Set instead of result if the configuration cannot be calculated
+    # (e.g. a sample size larger than the lexicon)
+    error: str | None = None
+    cached: bool = False
+
+
+def get_lexicon_hash(lexicon_path: str) -> str:
+    """
+    Returns a hash of the lexicon file's contents.
+    """
+    file_hash = hashlib.sha256()
+    with open(lexicon_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def get_cache_key(configuration: SweepConfiguration, lexicon_hash: str) -> str:
+    """
+    Returns the key for a configuration's cached result, which depends on the
+    lexicon's contents rather than its path.
+    """
+    index = INDEX_TYPES[configuration.index_type]
+    key = json.dumps(
+        [
+            CACHE_VERSION,
+            lexicon_hash,
+            f"{index.__module__}.{index.__qualname__}",
+            configuration.num_samples,
+            configuration.sample_size,
+            configuration.seed if configuration.num_samples else None,
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    An on-disk cache of index results, one JSON file per result.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY) -> None:
+        self.directory = directory
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> LexiconIndexCalculator.LexiconIndexResult | None:
+        try:
+            with open(self._get_path(key)) as f:
+                return LexiconIndexCalculator.LexiconIndexResult(**json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            return None
+
+    def put(self, key: str, result: LexiconIndexCalculator.LexiconIndexResult) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so an interrupted sweep never leaves a partial entry
+        temporary_path = f"{self._get_path(key)}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(dataclasses.asdict(result), f)
+        os.replace(temporary_path, self._get_path(key))
+
+
+# Lexicons loaded by this worker process, by path
+_lexicons: dict[str, LanguageLexicon] = dict()
+
+
+def _calculate(
+    configuration: SweepConfiguration,
+) -> LexiconIndexCalculator.LexiconIndexResult:
+    """
+    Calculate the index for a configuration. This runs in a worker process.
+    """
+    if configuration.lexicon_path not in _lexicons:
+        _lexicons[configuration.lexicon_path] = LanguageLexicon(
+            configuration.lexicon_path
+        )
+    lexicon = _lexicons[configuration.lexicon_path]
+    calculator = LexiconIndexCalculator(INDEX_TYPES[configuration.index_type])
+    if configuration.num_samples is None:
+        return calculator.calculate_index(lexicon)
+    return calculator.calculate_index_from_samples(
+        lexicon,
+        configuration.num_samples,
+        configuration.sample_size,
+        random.Random(configuration.seed),
+    )
+
+
+def get_configurations(
+    lexicon_paths: list[str],
+    index_types: str,
+    num_samples: list[int],
+    sample_sizes: list[int | float],
+    seed: int = 0,
+) -> list[SweepConfiguration]:
+    """
+    Returns every lexicon × index × sampling combination, including the
+    index over each entire lexicon.
+    """
+    samplings = [(None, None)] + [
+        (n, sample_size) for n in num_samples for sample_size in sample_sizes
+    ]
+    return [
+        SweepConfiguration(lexicon_path, index_type, n, sample_size, seed)
+        for lexicon_path in lexicon_paths
+        for index_type in index_types
+        for n, sample_size in samplings
+    ]
+
+
+def sweep(
+    configurations: list[SweepConfiguration],
+    cache: ResultCache | None = None,
+    num_workers: int | None = None,
+    refresh: bool = False,
+    on_result: Callable[[SweepResult], None] | None = None,
+) -> list[SweepResult]:
+    """
+    Calculate every configuration, reusing cached results and calculating
+    the rest across a process pool. Results are returned in the order of
+    configurations.
+
+    :param cache: the result cache (None to always recalculate)
+    :param num_workers: the number of worker processes (None for one per CPU)
+    :param refresh: recalculate every configuration (still caching the new results)
+    :param on_result: called with each result as it becomes available
+    """
+    lexicon_hashes = {
+        lexicon_path: get_lexicon_hash(lexicon_path)
+        for lexicon_path in {
+            configuration.lexicon_path for configuration in configurations
+        }
+    }
+    results: dict[SweepConfiguration, SweepResult] = dict()
+    uncached = []
+    for configuration in configurations:
+        key = get_cache_key(configuration, lexicon_hashes[configuration.lexicon_path])
+        result = cache.get(key) if cache and not refresh else None
+        if result:
+            results[configuration] = SweepResult(configuration, result, cached=True)
+            if on_result:
+                on_result(results[configuration])
+        else:
+            uncached.append((configuration, key))
+    if uncached:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {
+                executor.submit(_calculate, configuration): (configuration, key)
+                for configuration, key in uncached
+            }
+            for future in as_completed(futures):
+                configuration, key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    results[configuration] = SweepResult(configuration, None, str(e))
+                else:
+                    results[configuration] = SweepResult(configuration, result)
+                    if cache:
+                        cache.put(key, result)
+                if on_result:
+                    on_result(results[configuration])
+    return [results[configuration] for configuration in configurations]
+
+
+def format_table(results: list[SweepResult]) -> str:
+    """
+    Format results as a single comparison table, one row per configuration.
+    """
+    rows = [["lexicon", "type", "samples", "sample size", "index", "std dev", ""]]
+    for sweep_result in results:
+        configuration = sweep_result.configuration
+        row = [
+            os.path.basename(configuration.lexicon_path),
+            INDEX_TYPES[configuration.index_type].__name__,
+            str(configuration.num_samples or "-"),
+            str(configuration.sample_size or "-"),
+        ]
+        if sweep_result.result:
+            row += [
+                f"{sweep_result.result.index:.6f}",
+                f"{sweep_result.result.index_standard_deviation:.6f}",
+                "(cached)" if sweep_result.cached else "",
+            ]
+        else:
+            row += ["-", "-", sweep_result.error]
+        rows.append(row)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+        for row in rows
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Branching Index Sweep",
+        description="Calculates branching indices across lexicons, index types, and samplings",
+    )
+    parser.add_argument(
+        "lexicons",
+        nargs="*",
+        help="Specify the files containing line-separated words (default = every .txt in ./lexicons)",
+    )
+    parser.add_argument(
+        "-t",
+        "--types",
+        default="".join(INDEX_TYPES),
+        help="What types of indices to run: (b)inary, (t)otal",
+    )
+    parser.add_argument(
+        "-n",
+        "--num_samples",
+        type=int,
+        nargs="*",
+        default=[],
+        help="Also calculate each index via sampling with these numbers of samples",
+    )
+    parser.add_argument(
+        "-s",
+        "--sample_size",
+        type=parse_sample_size,
+        nargs="+",
+        default=[0.25],
+        help="The sample sizes to be used if num_samples is specified",
+    )
+    parser.add_argument(
+        "-j",
+        "--num_workers",
+        type=int,
+        default=None,
+        help="The number of worker processes (default = one per CPU)",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        default=DEFAULT_CACHE_DIRECTORY,
+        help="The directory for cached results",
+    )
+    parser.add_argument(
+        "-r",
+        "--refresh",
+        action="store_true",
+        help="Recalculate every configuration, ignoring cached results",
+    )
+    args = parser.parse_args()
+    for index_type in args.types:
+        if index_type not in INDEX_TYPES:
+            raise Exception(f"unknown index type {index_type}!")
+    lexicon_paths = args.lexicons or list(sorted(glob.glob("./lexicons/*.txt")))
+    configurations = get_configurations(
+        lexicon_paths, args.types, args.num_samples, args.sample_size
+    )
+    print(f"\nCalculating {len(configurations)} configurations ...")
+    results = sweep(
+        configurations, ResultCache(args.cache), args.num_workers, args.refresh
+    )
+    print()
+    print(format_table(results))
@@ -1,9 +1,12 @@
-from base_classes.lexicon import LanguageLexicon
+import itertools
+
+from base_classes.lexicon import LEXICON_BACKENDS, LanguageLexicon
 from branching.branching_index import (
     BinaryBranchingIndex,
     LexiconIndexCalculator,
     TotalBranchingIndex,
 )
+from branching.index_sweep import ResultCache, get_configurations, sweep
 
 
 def get_lexicon_path(lexicon_name: str) -> str:
@@ -54,3 +57,49 @@ def test_total_branching_index_sampled():
         assert abs(result.index - 0.076) < 0.05
         assert result.index_variance < 0.001
         assert result.index_standard_deviation < 0.01
+
+
+# Test that indices are updated in place as words are added and removed
+def test_branching_index_incremental():
+    for index_class, backend in itertools.product(
+        [BinaryBranchingIndex, TotalBranchingIndex], LEXICON_BACKENDS.values()
+    ):
+        lexicon = LanguageLexicon(get_lexicon_path("test_random_200_25"), backend)
+        index = index_class(lexicon)
+        index.calculate()
+        added = ["zeitgeist", "zeit", "a", "qqrajctxpjxwjwnkcmnktcfx"]
+        removed = ["cagszynj", "ozphps"]
+        lexicon.add_words(added)
+        lexicon.remove_words(removed)
+        expected = index_class(LanguageLexicon(lexicon.words)).calculate()
+        assert index.calculate() == expected
+        lexicon.remove_words(added)
+        lexicon.add_words(removed)
+        expected = index_class(LanguageLexicon(lexicon.words)).calculate()
+        assert index.calculate() == expected
+
+
+# Test sweeps reuse cached results only while a lexicon's contents are unchanged
+def test_index_sweep_cache(tmp_path):
+    lexicon_path = str(tmp_path / "lexicon.txt")
+    with open(get_lexicon_path("test_random_200_25")) as f:
+        words = f.read()
+    with open(lexicon_path, "w") as f:
+        f.write(words)
+    configurations = get_configurations([lexicon_path], "bt", [10], [50, 500])
+    cache = ResultCache(str(tmp_path / "cache"))
+    results = sweep(configurations, cache, num_workers=1)
+    assert [result.configuration for result in results] == configurations
+    assert not any(result.cached for result in results)
+    # 500 words is more than the lexicon has
+    assert [result.error is None for result in results] == [True, True, False] * 2
+    assert results[0].result == LexiconIndexCalculator(
+        BinaryBranchingIndex
+    ).calculate_index(LanguageLexicon(lexicon_path))
+    cached_results = sweep(configurations, cache, num_workers=1)
+    for result, cached_result in zip(results, cached_results):
+        assert cached_result.cached == (result.error is None)
+        assert cached_result.result == result.result
+    with open(lexicon_path, "a") as f:
+        f.write("zzzz\n")
+    assert not any(result.cached for result in sweep(configurations, cache))
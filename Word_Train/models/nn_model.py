@@ -1,6 +1,441 @@
+import argparse
+import dataclasses
+import random
+import time
+
 import torch
+from torch import nn
+
+from base_classes.lexicon import Codebook, LanguageLexicon, TrieNode
+from simulation.self_play import GamePlayer, PerfectPolicy, Policy
+from solver.word_train_solver import DEFAULT_MINIMUM_WORD_LENGTH, WordTrainSolver
+
+
+# The outcome classes the network predicts for each letter
+LOSING, POSSIBLE_WIN, CERTAIN_WIN = 0, 1, 2
+NUM_OUTCOMES = 3
+# Letters that cannot be played are ignored by the loss
+IGNORED_LABEL = -100
+# The network only sees the last this-many letters of the running word,
+# which keeps the cost of a move fixed
+DEFAULT_MAX_PREFIX_LENGTH = 6
+
+
+class Alphabet(Codebook):
+    """
+    A lexicon's codebook (0 is padding), encoding running words as tensors.
+    """
+
+    def encode_tensor(self, words: list[str], length: int) -> torch.Tensor:
+        """
+        Returns a (len(words), length) tensor of codes for the last length
+        letters of each word, right-aligned and left-padded with 0.
+        """
+        codes = self.encode_aligned(words, length)
+        if not codes:
+            return torch.zeros((len(words), length), dtype=torch.long)
+        if self.typecode == "B":
+            # Share the array's buffer rather than converting code by code
+            tensor = torch.frombuffer(codes, dtype=torch.uint8)
+        else:
+            tensor = torch.tensor(codes.tolist())
+        return tensor.view(len(words), length).long()
+
+
+class LetterOutcomeNetwork(nn.Module):
+    """
+    A small character-level network that predicts, for each letter of the
+    alphabet, whether playing it next is a losing, possible, or certain win.
+    """
+
+    def __init__(
+        self,
+        alphabet_size: int,
+        embedding_dim: int = 32,
+        hidden_dim: int = 128,
+    ) -> None:
+        super().__init__()
+        self.alphabet_size = alphabet_size
+        self.embedding = nn.Embedding(alphabet_size + 1, embedding_dim, padding_idx=0)
+        self.encoder = nn.GRU(embedding_dim, hidden_dim, batch_first=True)
+        self.head = nn.Linear(hidden_dim, alphabet_size * NUM_OUTCOMES)
+
+    def forward(self, codes: torch.Tensor) -> torch.Tensor:
+        """
+        :param codes: a (batch, length) tensor of encoded prefixes
+        :return: a (batch, alphabet_size, NUM_OUTCOMES) tensor of logits
+        """
+        _, hidden = self.encoder(self.embedding(codes))
+        return self.head(hidden[-1]).view(-1, self.alphabet_size, NUM_OUTCOMES)
+
+
+@dataclasses.dataclass
+class TrainingData:
+    prefixes: list[str]
+    # (len(prefixes), len(alphabet)) outcome labels, IGNORED_LABEL for letters
+    # that do not continue the prefix
+    labels: torch.Tensor
+
+
+def get_positions(
+    lexicon: LanguageLexicon, min_word_length: int, max_prefix_length: int
+) -> list[tuple[str, TrieNode]]:
+    """
+    Returns every prefix (and its node) up to max_prefix_length letters
+    at which the game is still going.
+    """
+    positions = []
+    nodes = [("", lexicon.trie.root)]
+    while nodes:
+        prefix, node = nodes.pop()
+        if node.is_leaf and len(prefix) >= min_word_length:
+            continue
+        if node.children:
+            positions.append((prefix, node))
+        if len(prefix) < max_prefix_length:
+            for letter, child in node.children.items():
+                nodes.append((prefix + letter, child))
+    return positions
+
+
+def generate_training_data(
+    lexicon: LanguageLexicon,
+    alphabet: Alphabet,
+    num_players: int = 2,
+    min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+    max_prefix_length: int = DEFAULT_MAX_PREFIX_LENGTH,
+    max_positions: int | None = None,
+    seed: int = 0,
+) -> TrainingData:
+    """
+    Label positions (prefixes) with the exact solver's outcome for each letter.
+
+    :param max_positions: if given, label a random sample of this many positions
+    """
+    positions = get_positions(lexicon, min_word_length, max_prefix_length)
+    if max_positions is not None and max_positions < len(positions):
+        positions = random.Random(seed).sample(positions, max_positions)
+    # Solving shorter prefixes first fills the cache for the longer ones
+    positions.sort(key=lambda position: len(position[0]))
+    solver = WordTrainSolver(lexicon, cache_depth=max_prefix_length)
+    labels = torch.full((len(positions), len(alphabet)), IGNORED_LABEL)
+    for i, (prefix, node) in enumerate(positions):
+        solution = solver.solve(prefix, num_players, min_word_length)
+        outcomes = {letter: LOSING for letter in node.children}
+        outcomes.update({letter: POSSIBLE_WIN for letter in solution.possible_win_letters})
+        outcomes.update({letter: CERTAIN_WIN for letter in solution.certain_win_letters})
+        for letter, outcome in outcomes.items():
+            labels[i, alphabet.codes[letter] - 1] = outcome
+    return TrainingData([prefix for prefix, _ in positions], labels)
+
+
+def train(
+    network: LetterOutcomeNetwork,
+    alphabet: Alphabet,
+    data: TrainingData,
+    max_prefix_length: int = DEFAULT_MAX_PREFIX_LENGTH,
+    epochs: int = 10,
+    batch_size: int = 256,
+    learning_rate: float = 1e-3,
+    seed: int = 0,
+) -> list[float]:
+    """
+    Train network on data (on the CPU). Returns the mean loss for each epoch.
+    """
+    torch.manual_seed(seed)
+    codes = alphabet.encode_tensor(data.prefixes, max_prefix_length)
+    optimizer = torch.optim.Adam(network.parameters(), lr=learning_rate)
+    loss_function = nn.CrossEntropyLoss(ignore_index=IGNORED_LABEL)
+    network.train()
+    epoch_losses = []
+    for _ in range(epochs):
+        permutation = torch.randperm(len(data.prefixes))
+        total_loss = 0.0
+        for start in range(0, len(permutation), batch_size):
+            batch = permutation[start : start + batch_size]
+            logits = network(codes[batch])
+            loss = loss_function(
+                logits.reshape(-1, NUM_OUTCOMES), data.labels[batch].reshape(-1)
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch)
+        epoch_losses.append(total_loss / max(len(data.prefixes), 1))
+    network.eval()
+    return epoch_losses
+
+
+class NeuralPolicy(Policy):
+    """
+    Chooses letters with a trained LetterOutcomeNetwork instead of solving,
+    so a move costs the same however large the subtree below it is.
+
+    A temperature of 0 plays the best predicted letter; higher temperatures
+    sample more freely (i.e., play worse), for easier opponents.
+    """
+
+    def __init__(
+        self,
+        network: LetterOutcomeNetwork,
+        alphabet: Alphabet,
+        max_prefix_length: int = DEFAULT_MAX_PREFIX_LENGTH,
+        temperature: float = 0.0,
+        rng: random.Random | None = None,
+        num_players: int = 2,
+        min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+    ) -> None:
+        super().__init__(None, num_players, min_word_length, rng or random.Random())
+        self.network = network.eval()
+        self.alphabet = alphabet
+        self.max_prefix_length = max_prefix_length
+        self.temperature = temperature
+
+    def choose_letters(self, words: list[str], nodes: list[TrieNode]) -> list[str]:
+        """
+        Choose the next letter for a batch of running words at once.
+        """
+        with torch.inference_mode():
+            probabilities = self.network(
+                self.alphabet.encode_tensor(words, self.max_prefix_length)
+            ).softmax(dim=-1)
+        # A certain win is worth twice a possible win
+        scores = (
+            probabilities[..., CERTAIN_WIN] + 0.5 * probabilities[..., POSSIBLE_WIN]
+        )
+        letters = []
+        for i, node in enumerate(nodes):
+            options = list(node.children)
+            option_scores = scores[
+                i, [self.alphabet.codes[letter] - 1 for letter in options]
+            ]
+            if self.temperature > 0:
+                weights = (option_scores / self.temperature).softmax(dim=0)
+                letters.append(self.rng.choices(options, weights.tolist())[0])
+            else:
+                letters.append(options[int(option_scores.argmax())])
+        return letters
+
+    def choose_letter(self, word: str, node: TrieNode) -> str:
+        return self.choose_letters([word], [node])[0]
+
+
+def save_model(
+    path: str,
+    network: LetterOutcomeNetwork,
+    alphabet: Alphabet,
+    max_prefix_length: int,
+) -> None:
+    torch.save(
+        {
+            "characters": alphabet.characters,
+            "max_prefix_length": max_prefix_length,
+            "embedding_dim": network.embedding.embedding_dim,
+            "hidden_dim": network.encoder.hidden_size,
+            "state_dict": network.state_dict(),
+        },
+        path,
+    )
+
+
+def load_policy(
+    path: str,
+    temperature: float = 0.0,
+    num_players: int = 2,
+    min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+) -> NeuralPolicy:
+    """
+    Load a model saved by save_model as a NeuralPolicy.
+    """
+    saved = torch.load(path)
+    alphabet = Alphabet(saved["characters"])
+    network = LetterOutcomeNetwork(
+        len(alphabet), saved["embedding_dim"], saved["hidden_dim"]
+    )
+    network.load_state_dict(saved["state_dict"])
+    return NeuralPolicy(
+        network,
+        alphabet,
+        saved["max_prefix_length"],
+        temperature=temperature,
+        num_players=num_players,
+        min_word_length=min_word_length,
+    )
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    positions: int
+    solver_seconds_per_move: float
+    network_seconds_per_move: float
+    batched_network_seconds_per_move: float
+    # The fraction of positions where the network chose a letter with the
+    # best outcome available
+    best_outcome_rate: float
+    # The fraction of positions with a certain win where the network chose one
+    certain_win_rate: float
+    # The fraction of games the network won as the first player against perfect play
+    win_rate_against_perfect: float
+
+
+def benchmark(
+    lexicon: LanguageLexicon,
+    policy: NeuralPolicy,
+    num_players: int = 2,
+    min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+    num_positions: int = 1000,
+    num_games: int = 200,
+    seed: int = 0,
+) -> BenchmarkResult:
+    """
+    Compare the network's moves to the exact solver's in speed and quality
+    on positions from random walks down the trie.
+    """
+    rng = random.Random(seed)
+    game_player = GamePlayer(lexicon, num_players, min_word_length)
+    positions = []
+    while len(positions) < num_positions:
+        word, node = "", lexicon.trie.root
+        stop_length = rng.randint(0, 2 * min_word_length)
+        while len(word) < stop_length:
+            letter = rng.choice(list(node.children))
+            child = node.children[letter]
+            if (
+                child.is_leaf and len(word) + 1 >= min_word_length
+            ) or not game_player.is_live(child, len(word) + 1):
+                break
+            word, node = word + letter, child
+        positions.append((word, node))
+    words = [word for word, _ in positions]
+    nodes = [node for _, node in positions]
+
+    # An uncached solver measures the cost of solving each move from scratch
+    solver = WordTrainSolver(lexicon, cache_depth=-1)
+    start = time.perf_counter()
+    solutions = [solver.solve(word, num_players, min_word_length) for word in words]
+    solver_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for word, node in positions:
+        policy.choose_letter(word, node)
+    network_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    letters = policy.choose_letters(words, nodes)
+    batched_network_seconds = time.perf_counter() - start
+
+    best_outcomes = 0
+    certain_win_positions = 0
+    certain_wins = 0
+    for letter, solution in zip(letters, solutions):
+        if solution.certain_win_letters:
+            certain_win_positions += 1
+            certain_wins += letter in solution.certain_win_letters
+            best_outcomes += letter in solution.certain_win_letters
+        elif solution.possible_win_letters:
+            best_outcomes += letter in solution.possible_win_letters
+        else:
+            best_outcomes += 1
+
+    perfect_policy = PerfectPolicy(
+        game_player.solver, num_players, min_word_length, rng
+    )
+    wins = sum(
+        game_player.play([policy, perfect_policy]).winner == 0
+        for _ in range(num_games)
+    )
+    return BenchmarkResult(
+        num_positions,
+        solver_seconds / num_positions,
+        network_seconds / num_positions,
+        batched_network_seconds / num_positions,
+        best_outcomes / num_positions,
+        certain_wins / certain_win_positions if certain_win_positions else 1,
+        wins / num_games if num_games else 0,
+    )
 
 
-def experiment():
-    # do this
-    return None
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Word Train NN Model",
+        description="Trains and benchmarks a neural move policy for Word Train",
+    )
+    parser.add_argument("command", choices=["train", "benchmark"])
+    parser.add_argument(
+        "lexicon", help="Specify the file containing line-separated words"
+    )
+    parser.add_argument("model", help="The path to save (train) or load (benchmark)")
+    parser.add_argument(
+        "-n",
+        "--num_players",
+        type=int,
+        required=False,
+        help="The number of players in the game",
+        default=2,
+    )
+    parser.add_argument(
+        "-m",
+        "--min_word_length",
+        type=int,
+        required=False,
+        help="The minimum word length for a winning word",
+        default=DEFAULT_MINIMUM_WORD_LENGTH,
+    )
+    parser.add_argument(
+        "-l",
+        "--max_prefix_length",
+        type=int,
+        required=False,
+        help="(train) The longest prefix the network sees",
+        default=DEFAULT_MAX_PREFIX_LENGTH,
+    )
+    parser.add_argument(
+        "-p",
+        "--max_positions",
+        type=int,
+        required=False,
+        help="(train) Label at most this many positions",
+        default=None,
+    )
+    parser.add_argument(
+        "-e",
+        "--epochs",
+        type=int,
+        required=False,
+        help="(train) The number of training epochs",
+        default=10,
+    )
+    args = parser.parse_args()
+    print("\nLoading lexicon ... ")
+    lexicon = LanguageLexicon(args.lexicon)
+    if args.command == "train":
+        alphabet = Alphabet(lexicon.codebook.characters)
+        print("\nLabeling positions ...")
+        data = generate_training_data(
+            lexicon,
+            alphabet,
+            args.num_players,
+            args.min_word_length,
+            args.max_prefix_length,
+            args.max_positions,
+        )
+        print(f"\nTraining on {len(data.prefixes)} positions ...")
+        network = LetterOutcomeNetwork(len(alphabet))
+        for epoch, loss in enumerate(
+            train(network, alphabet, data, args.max_prefix_length, args.epochs)
+        ):
+            print(f"epoch {epoch}: loss {loss}")
+        save_model(args.model, network, alphabet, args.max_prefix_length)
+        print(f"\nWrote {args.model}")
+    else:
+        print("\nBenchmarking ...")
+        print(
+            benchmark(
+                lexicon,
+                load_policy(
+                    args.model,
+                    num_players=args.num_players,
+                    min_word_length=args.min_word_length,
+                ),
+                args.num_players,
+                args.min_word_length,
+            )
+        )
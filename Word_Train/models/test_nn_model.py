@@ -0,0 +1,46 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from base_classes.lexicon import LanguageLexicon
+
+from .nn_model import (
+    CERTAIN_WIN,
+    IGNORED_LABEL,
+    LOSING,
+    Alphabet,
+    LetterOutcomeNetwork,
+    NeuralPolicy,
+    generate_training_data,
+    train,
+)
+
+
+# Test that positions are labeled with the solver's outcome for each letter
+def test_generate_training_data():
+    lexicon = LanguageLexicon(["abcd", "bcdef", "bcdeg"])
+    alphabet = Alphabet(list(lexicon.characters))
+    data = generate_training_data(lexicon, alphabet)
+    root_labels = data.labels[data.prefixes.index("")].tolist()
+    assert root_labels[alphabet.codes["a"] - 1] == LOSING
+    assert root_labels[alphabet.codes["b"] - 1] == CERTAIN_WIN
+    assert root_labels[alphabet.codes["c"] - 1] == IGNORED_LABEL
+    # Positions where the game is over are not included
+    assert "abcd" not in data.prefixes
+
+
+# Test that a trained network learns to play a certain win
+def test_neural_policy():
+    lexicon = LanguageLexicon(["abcd", "bcdef", "bcdeg"])
+    alphabet = Alphabet(list(lexicon.characters))
+    data = generate_training_data(lexicon, alphabet)
+    network = LetterOutcomeNetwork(len(alphabet), 8, 16)
+    losses = train(network, alphabet, data, epochs=200, batch_size=8)
+    assert losses[-1] < losses[0]
+    policy = NeuralPolicy(network, alphabet)
+    assert policy.solver is None
+    assert (policy.num_players, policy.min_word_length) == (2, 4)
+    assert policy.choose_letter("", lexicon.trie.root) == "b"
+    nodes = [lexicon.trie.root, lexicon.trie.get_prefix_node("bcde")]
+    assert policy.choose_letters(["", "bcde"], nodes)[0] == "b"
+    assert policy.choose_letters(["", "bcde"], nodes)[1] in ["f", "g"]
@@ -0,0 +1,436 @@
+import abc
+import argparse
+import collections
+import csv
+import dataclasses
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator
+
+from base_classes.lexicon import LanguageLexicon, TrieNode
+from solver.word_train_solver import DEFAULT_MINIMUM_WORD_LENGTH, WordTrainSolver
+from word_train import choose_computer_letter
+
+
+# Solves are cached deeper than usual since self-play revisits the same
+# positions across many games
+SIMULATION_CACHE_DEPTH = 6
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class Policy(abc.ABC):
+    """
+    An abstract class for a strategy that chooses the next letter in a game.
+    Policies that never solve (e.g., a learned policy) have no solver.
+    """
+
+    def __init__(
+        self,
+        solver: WordTrainSolver | None,
+        num_players: int,
+        min_word_length: int,
+        rng: random.Random,
+    ) -> None:
+        self.solver = solver
+        self.num_players = num_players
+        self.min_word_length = min_word_length
+        self.rng = rng
+
+    @abc.abstractmethod
+    def choose_letter(self, word: str, node: TrieNode) -> str:
+        """
+        :param word: the current running word
+        :param node: the node for word in the lexicon trie
+        :return: the next letter (one of node's children)
+        """
+        raise NotImplementedError()
+
+
+class RandomPolicy(Policy):
+    """
+    Choose uniformly among the letters that continue some word.
+    """
+
+    def choose_letter(self, word: str, node: TrieNode) -> str:
+        return self.rng.choice(list(node.children))
+
+
+class HeuristicPolicy(Policy):
+    """
+    The computer's strategy in word_train (which avoids certain wins when
+    possible to give the player a chance).
+    """
+
+    def choose_letter(self, word: str, node: TrieNode) -> str:
+        solution = None
+        if word:
+            solution = self.solver.solve(word, self.num_players, self.min_word_length)
+        return choose_computer_letter(node, solution, self.rng)
+
+
+class PerfectPolicy(Policy):
+    """
+    Choose a certain win when there is one, then a possible win,
+    and otherwise any letter. The last solution is kept so that games
+    can record whether this policy ever had a certain win.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.last_solution: WordTrainSolver.WordTrainSolution | None = None
+
+    def choose_letter(self, word: str, node: TrieNode) -> str:
+        self.last_solution = self.solver.solve(
+            word, self.num_players, self.min_word_length
+        )
+        letters = (
+            self.last_solution.certain_win_letters
+            or self.last_solution.possible_win_letters
+            or list(node.children)
+        )
+        return self.rng.choice(letters)
+
+
+POLICIES: dict[str, type[Policy]] = {
+    "random": RandomPolicy,
+    "heuristic": HeuristicPolicy,
+    "perfect": PerfectPolicy,
+}
+
+
+@dataclasses.dataclass
+class GameResult:
+    # The seat (0 moves first) that finished a word or, in two-player games,
+    # whose opponent chose a letter leading to no word, if any
+    winner: int | None
+    # The seat that chose a letter leading to no word, if any
+    loser: int | None
+    # The final running word
+    word: str
+    # The seats that had a certain win (as seen by a PerfectPolicy) at some point
+    certain_win_seats: set[int] = dataclasses.field(default_factory=set)
+
+
+@dataclasses.dataclass
+class SimulationStats:
+    """
+    Aggregated results for many games with the same configuration.
+    """
+
+    num_players: int
+    games: int = 0
+    wins_by_seat: list[int] = dataclasses.field(default_factory=list)
+    losses_by_seat: list[int] = dataclasses.field(default_factory=list)
+    # Games in which the seat had a certain win at some point
+    certain_wins_by_seat: list[int] = dataclasses.field(default_factory=list)
+    # Of those games, the ones the seat went on to win
+    converted_certain_wins_by_seat: list[int] = dataclasses.field(
+        default_factory=list
+    )
+    # Game length (i.e., final word length) -> number of games
+    game_lengths: collections.Counter = dataclasses.field(
+        default_factory=collections.Counter
+    )
+
+    def __post_init__(self) -> None:
+        for seat_counts in [
+            self.wins_by_seat,
+            self.losses_by_seat,
+            self.certain_wins_by_seat,
+            self.converted_certain_wins_by_seat,
+        ]:
+            seat_counts += [0] * (self.num_players - len(seat_counts))
+
+    def add(self, result: GameResult) -> None:
+        self.games += 1
+        if result.winner is not None:
+            self.wins_by_seat[result.winner] += 1
+        if result.loser is not None:
+            self.losses_by_seat[result.loser] += 1
+        for seat in result.certain_win_seats:
+            self.certain_wins_by_seat[seat] += 1
+            if seat == result.winner:
+                self.converted_certain_wins_by_seat[seat] += 1
+        self.game_lengths[len(result.word)] += 1
+
+    def merge(self, other: "SimulationStats") -> None:
+        self.games += other.games
+        for seat in range(self.num_players):
+            self.wins_by_seat[seat] += other.wins_by_seat[seat]
+            self.losses_by_seat[seat] += other.losses_by_seat[seat]
+            self.certain_wins_by_seat[seat] += other.certain_wins_by_seat[seat]
+            self.converted_certain_wins_by_seat[
+                seat
+            ] += other.converted_certain_wins_by_seat[seat]
+        self.game_lengths.update(other.game_lengths)
+
+    @property
+    def mean_game_length(self) -> float:
+        if not self.games:
+            return 0
+        return sum(length * n for length, n in self.game_lengths.items()) / self.games
+
+
+class GamePlayer:
+    """
+    Plays headless games of Word Train between policies on a single lexicon.
+    Solves (and which prefixes can still reach a word) are cached across games.
+    """
+
+    def __init__(
+        self,
+        lexicon: LanguageLexicon,
+        num_players: int,
+        min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+        solver: WordTrainSolver | None = None,
+    ) -> None:
+        self.lexicon = lexicon
+        self.num_players = num_players
+        self.min_word_length = min_word_length
+        self.solver = solver or WordTrainSolver(lexicon, SIMULATION_CACHE_DEPTH)
+        self._is_live: dict[TrieNode, bool] = dict()
+
+    def is_live(self, node: TrieNode, length: int) -> bool:
+        """
+        Returns whether a word of at least min_word_length letters
+        can still be reached from node (whose prefix has length letters).
+        """
+        if node not in self._is_live:
+            nodes = [(node, length, False)]
+            # An iterative post-order DFS, since words can be long
+            while nodes:
+                current, current_length, children_done = nodes.pop()
+                if current in self._is_live:
+                    continue
+                if current.is_leaf and current_length >= self.min_word_length:
+                    self._is_live[current] = True
+                elif children_done:
+                    self._is_live[current] = any(
+                        self._is_live[child] for child in current.children.values()
+                    )
+                else:
+                    nodes.append((current, current_length, True))
+                    for child in current.children.values():
+                        nodes.append((child, current_length + 1, False))
+        return self._is_live[node]
+
+    def play(self, policies: list[Policy]) -> GameResult:
+        """
+        Play one game. Seat i is played by policies[i % len(policies)].
+        """
+        word = ""
+        node = self.lexicon.trie.root
+        certain_win_seats = set()
+        seat = 0
+        while True:
+            policy = policies[seat % len(policies)]
+            letter = policy.choose_letter(word, node)
+            if isinstance(policy, PerfectPolicy) and (
+                policy.last_solution.certain_win_letters
+            ):
+                certain_win_seats.add(seat)
+            node = node.children.get(letter)
+            word += letter
+            if not node or not self.is_live(node, len(word)):
+                winner = 1 - seat if self.num_players == 2 else None
+                return GameResult(winner, seat, word, certain_win_seats)
+            if node.is_leaf and len(word) >= self.min_word_length:
+                return GameResult(seat, None, word, certain_win_seats)
+            seat = (seat + 1) % self.num_players
+
+
+# Per-process GamePlayers, so workers reuse solves across chunks
+_game_players: dict[tuple[str, int, int], GamePlayer] = dict()
+
+
+def _simulate_chunk(
+    lexicon_path: str,
+    policy_names: list[str],
+    num_players: int,
+    min_word_length: int,
+    num_games: int,
+    seed: int,
+) -> SimulationStats:
+    """
+    Play num_games games and return their aggregated results.
+    This runs in a worker process.
+    """
+    key = (lexicon_path, num_players, min_word_length)
+    if key not in _game_players:
+        _game_players[key] = GamePlayer(
+            LanguageLexicon(lexicon_path), num_players, min_word_length
+        )
+    game_player = _game_players[key]
+    rng = random.Random(seed)
+    policies = [
+        POLICIES[name](game_player.solver, num_players, min_word_length, rng)
+        for name in policy_names
+    ]
+    stats = SimulationStats(num_players)
+    for _ in range(num_games):
+        stats.add(game_player.play(policies))
+    return stats
+
+
+def simulate(
+    lexicon_path: str,
+    policy_names: list[str],
+    num_players: int,
+    num_games: int,
+    min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+    num_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: int = 0,
+    on_progress: Callable[[SimulationStats], None] | None = None,
+) -> SimulationStats:
+    """
+    Play num_games games in chunks across a process pool.
+
+    :param policy_names: the policies (see POLICIES) for each seat, cycled
+    if there are fewer policies than players
+    :param num_workers: the number of worker processes (None for one per CPU)
+    :param seed: chunk i is seeded with seed + i, so results are reproducible
+    :param on_progress: called with the running totals after each chunk
+    """
+    for name in policy_names:
+        if name not in POLICIES:
+            raise Exception(f"unknown policy {name}!")
+    stats = SimulationStats(num_players)
+    chunk_sizes = [chunk_size] * (num_games // chunk_size)
+    if num_games % chunk_size:
+        chunk_sizes.append(num_games % chunk_size)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(
+                _simulate_chunk,
+                lexicon_path,
+                policy_names,
+                num_players,
+                min_word_length,
+                size,
+                seed + i,
+            )
+            for i, size in enumerate(chunk_sizes)
+        ]
+        for future in as_completed(futures):
+            stats.merge(future.result())
+            if on_progress:
+                on_progress(stats)
+    return stats
+
+
+def get_result_rows(
+    lexicon_path: str,
+    policy_names: list[str],
+    min_word_length: int,
+    stats: SimulationStats,
+) -> Iterator[dict]:
+    """
+    Flatten stats into one row per seat.
+    """
+    for seat in range(stats.num_players):
+        yield {
+            "lexicon": lexicon_path,
+            "num_players": stats.num_players,
+            "min_word_length": min_word_length,
+            "policy": policy_names[seat % len(policy_names)],
+            "seat": seat,
+            "games": stats.games,
+            "wins": stats.wins_by_seat[seat],
+            "losses": stats.losses_by_seat[seat],
+            "certain_wins": stats.certain_wins_by_seat[seat],
+            "converted_certain_wins": stats.converted_certain_wins_by_seat[seat],
+            "mean_game_length": stats.mean_game_length,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Word Train Self-Play",
+        description="Plays many headless games of Word Train between policies",
+    )
+    parser.add_argument(
+        "lexicons",
+        nargs="+",
+        help="Specify the files containing line-separated words",
+    )
+    parser.add_argument(
+        "-p",
+        "--policies",
+        required=False,
+        help=f"Comma-separated policies by seat ({', '.join(POLICIES)})",
+        default="perfect,random",
+    )
+    parser.add_argument(
+        "-n",
+        "--num_players",
+        type=int,
+        nargs="+",
+        required=False,
+        help="The numbers of players in the game",
+        default=[2],
+    )
+    parser.add_argument(
+        "-m",
+        "--min_word_length",
+        type=int,
+        required=False,
+        help="The minimum word length for a winning word",
+        default=DEFAULT_MINIMUM_WORD_LENGTH,
+    )
+    parser.add_argument(
+        "-g", "--num_games", type=int, required=True, help="The number of games"
+    )
+    parser.add_argument(
+        "-j",
+        "--num_workers",
+        type=int,
+        required=False,
+        help="The number of worker processes",
+        default=None,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="The .csv (one row per seat) or .json (one line per configuration) output",
+    )
+    args = parser.parse_args()
+    policy_names = args.policies.split(",")
+    with open(args.output, "w", newline="") as file:
+        writer = None
+        # Results are written as each configuration finishes
+        for lexicon_path in args.lexicons:
+            for num_players in args.num_players:
+                print(f"\nSimulating {lexicon_path} with {num_players} players ...")
+                stats = simulate(
+                    lexicon_path,
+                    policy_names,
+                    num_players,
+                    args.num_games,
+                    args.min_word_length,
+                    args.num_workers,
+                    on_progress=lambda stats: print(f"{stats.games} games", end="\r"),
+                )
+                print()
+                rows = list(
+                    get_result_rows(
+                        lexicon_path, policy_names, args.min_word_length, stats
+                    )
+                )
+                if args.output.endswith(".json"):
+                    result = {
+                        "lexicon": lexicon_path,
+                        "min_word_length": args.min_word_length,
+                        "policies": policy_names,
+                        **dataclasses.asdict(stats),
+                        "game_lengths": dict(sorted(stats.game_lengths.items())),
+                    }
+                    file.write(json.dumps(result) + "\n")
+                else:
+                    if not writer:
+                        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+                        writer.writeheader()
+                    writer.writerows(rows)
+                file.flush()
@@ -0,0 +1,85 @@
+import random
+
+from base_classes.lexicon import LanguageLexicon
+
+from .self_play import (
+    GamePlayer,
+    PerfectPolicy,
+    RandomPolicy,
+    SimulationStats,
+    simulate,
+)
+
+
+def get_policies(
+    game_player: GamePlayer, policy_classes: list[type], seed: int = 0
+) -> list:
+    rng = random.Random(seed)
+    return [
+        policy_class(
+            game_player.solver,
+            game_player.num_players,
+            game_player.min_word_length,
+            rng,
+        )
+        for policy_class in policy_classes
+    ]
+
+
+# Test that perfect play converts a certain win against any opponent
+def test_perfect_play_converts_certain_wins():
+    # The first player wins with "bcdef" or loses with "abcd"
+    lexicon = LanguageLexicon(["abcd", "bcdef", "bcdeg"])
+    game_player = GamePlayer(lexicon, 2)
+    policies = get_policies(game_player, [PerfectPolicy, RandomPolicy])
+    for _ in range(20):
+        result = game_player.play(policies)
+        assert result.winner == 0
+        assert result.loser is None
+        assert result.word in ["bcdef", "bcdeg"]
+        assert result.certain_win_seats == {0}
+
+
+# Test that a letter leading to no word long enough loses
+def test_dead_end_loses():
+    lexicon = LanguageLexicon(["abc", "bcdef"])
+    game_player = GamePlayer(lexicon, 3)
+    policies = get_policies(game_player, [RandomPolicy])
+    results = [game_player.play(policies) for _ in range(50)]
+    for result in results:
+        if result.word[0] == "a":
+            # With three players, no one wins when someone reaches a dead end
+            assert (result.winner, result.loser) == (None, 0)
+        else:
+            assert (result.winner, result.loser) == (1, None)
+    assert {result.word for result in results} == {"a", "bcdef"}
+
+
+# Test that aggregated stats are the same however many workers play the chunks
+def test_simulate():
+    stats = SimulationStats(2)
+    for chunk_size in [7, 100]:
+        chunked_stats = simulate(
+            "./lexicons/test_random_200_25.txt",
+            ["perfect", "random"],
+            2,
+            100,
+            num_workers=2,
+            chunk_size=chunk_size,
+        )
+        assert chunked_stats == simulate(
+            "./lexicons/test_random_200_25.txt",
+            ["perfect", "random"],
+            2,
+            100,
+            num_workers=1,
+            chunk_size=chunk_size,
+        )
+        assert chunked_stats.games == 100
+        assert sum(chunked_stats.game_lengths.values()) == 100
+        # Every two-player game has a winner
+        assert sum(chunked_stats.wins_by_seat) == 100
+        stats.merge(chunked_stats)
+    assert stats.games == 200
+    assert stats.converted_certain_wins_by_seat[1] == 0
+    assert stats.certain_wins_by_seat[0] >= stats.converted_certain_wins_by_seat[0]
@@ -0,0 +1,196 @@
+import argparse
+
+from base_classes.lexicon import (
+    LanguageLexicon,
+    LexiconListener,
+    WordIdSet,
+    gc_paused,
+)
+from base_classes.suffix_automaton import SubstringIndex
+from solver.word_train_solver import DEFAULT_MINIMUM_WORD_LENGTH, WordTrainSolver
+
+
+class SubstringWordTrainSolver(LexiconListener):
+    """
+    A solver for the two-sided variant of Word Train, in which each player
+    adds a letter to either end of the running word. As in Word Train, the
+    player who completes a word of at least the minimum length ends the game,
+    and the running word must always be a substring of such a word.
+
+    Solutions are WordTrainSolver.WordTrainSolutions, except that a move is
+    either end of the running word, so the letter lists hold the running
+    words that each move produces (e.g. "ppl" -> "appl" or "pple").
+    Words are WordIdSets over the whole lexicon (the empty prefix).
+    """
+
+    def __init__(self, lexicon: LanguageLexicon) -> None:
+        self.lexicon = lexicon
+        self._substring_index: SubstringIndex | None = None
+        lexicon.add_listener(self)
+
+    def after_word_change(self, word: str) -> None:
+        # The automata cannot remove words, so rebuild them when next needed
+        self._substring_index = None
+
+    @property
+    def substring_index(self) -> SubstringIndex:
+        """
+        Returns the lexicon's substring index, building it if needed
+        """
+        if self._substring_index is None:
+            self._substring_index = SubstringIndex(self.lexicon.words)
+        return self._substring_index
+
+    def get_next_words(self, word: str, min_word_length: int) -> set[str]:
+        """
+        Returns the running words that can follow word, adding a letter to either end.
+        """
+        index = self.substring_index
+        return {
+            word + letter
+            for letter in index.get_right_extensions(word, min_word_length)
+        } | {letter + word for letter in index.get_left_extensions(word, min_word_length)}
+
+    def _solve_recursively(
+        self,
+        original_word_length: int,
+        word: str,
+        num_players: int,
+        min_word_length: int,
+        outcomes: dict[str, tuple[int, int, int, int]],
+    ) -> tuple[
+        int, int, int, int
+    ]:  # Certain wins, possible wins, unavoidable losses, all losses
+        """
+        Recurse through the running words that can follow word, accumulating
+        words that are certain wins, possible wins, and (unavoidable) losses
+        as bitsets of word IDs.
+
+        The same running word can be reached by adding letters in different
+        orders, so results are memoized in outcomes.
+        """
+        if word in outcomes:
+            return outcomes[word]
+        turn = (len(word) - original_word_length) % num_players
+        if len(word) >= min_word_length:
+            # Find the word's ID and whether it is a word at all in one search
+            words_by_id = self.lexicon.trie.words_by_id
+            word_id = words_by_id.bisect_left(word)
+            if word_id < len(words_by_id) and words_by_id[word_id] == word:
+                bit = 1 << word_id
+                if turn == 1:  # The final word happened on the current player's turn
+                    result = (bit, 0, 0, 0)
+                else:  # The final word happened on another player's turn
+                    result = (0, 0, bit, bit)
+                outcomes[word] = result
+                return result
+
+        certain_wins = 0
+        possible_wins = 0
+        unavoidable_losses = 0
+        all_losses = 0
+        for next_word in self.get_next_words(word, min_word_length):
+            new_certain_wins, new_possible_wins, new_losses, new_all_losses = (
+                self._solve_recursively(
+                    original_word_length,
+                    next_word,
+                    num_players,
+                    min_word_length,
+                    outcomes,
+                )
+            )
+            certain_wins |= new_certain_wins
+            possible_wins |= new_possible_wins
+            unavoidable_losses |= new_losses
+            all_losses |= new_all_losses
+        result = WordTrainSolver._resolve_turn(
+            turn, certain_wins, possible_wins, unavoidable_losses, all_losses
+        )
+        outcomes[word] = result
+        return result
+
+    def solve(
+        self,
+        word: str,
+        num_players: int,
+        min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+    ) -> WordTrainSolver.WordTrainSolution:
+        """
+        "Solve" two-sided Word Train. Returns a WordTrainSolution instance
+        whose letter lists hold the running words each move produces.
+
+        :param word: the running word to solve from
+        :param num_players: the number of players in the game
+        :min_word_length: the minimum number of letters a final word must be
+        :returns: an instance of 'WordTrainSolution'
+        """
+        if not self.substring_index.is_substring(word, min_word_length):
+            raise Exception(
+                f"Word {word} does not occur in any word of at least {min_word_length} letters"
+            )
+        outcomes = dict()
+        with gc_paused():
+            certain_wins, possible_wins, _, all_losses = self._solve_recursively(
+                len(word), word, num_players, min_word_length, outcomes
+            )
+        win_words = set()
+        possible_win_words = set()
+        # A running word that is already a final word ended the game, so every move loses
+        if len(word) >= min_word_length and word in self.lexicon.words:
+            next_words = set()
+        else:
+            next_words = self.get_next_words(word, min_word_length)
+        for next_word in next_words:
+            next_certain_wins, next_possible_wins, _, _ = outcomes[next_word]
+            if next_certain_wins:
+                win_words.add(next_word)
+            elif next_possible_wins:
+                possible_win_words.add(next_word)
+        losing_words = {
+            next_word
+            for letter in self.lexicon.characters
+            for next_word in [word + letter, letter + word]
+            if next_word not in win_words and next_word not in possible_win_words
+        }
+        trie = self.lexicon.trie
+        return WordTrainSolver.WordTrainSolution(
+            WordIdSet(certain_wins, trie),
+            WordIdSet(possible_wins, trie),
+            WordIdSet(all_losses, trie),
+            list(sorted(win_words)),
+            list(sorted(possible_win_words)),
+            list(sorted(losing_words)),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Two-Sided Word Train Solver",
+        description="A solver for Word Train with letters added to either end",
+    )
+    parser.add_argument(
+        "lexicon", help="Specify the file containing line-separated words"
+    )
+    parser.add_argument("-w", "--word", required=True, help="The current running word")
+    parser.add_argument(
+        "-n",
+        "--num_players",
+        type=int,
+        required=False,
+        help="The number of players in the game",
+        default=2,
+    )
+    parser.add_argument(
+        "-m",
+        "--min_word_length",
+        type=int,
+        required=False,
+        help="The minimum word length for a winning word",
+        default=DEFAULT_MINIMUM_WORD_LENGTH,
+    )
+    args = parser.parse_args()
+    print("\nLoading lexicon ... ")
+    lexicon = LanguageLexicon(args.lexicon)
+    print("\nSolving ...")
+    solver = SubstringWordTrainSolver(lexicon)
+    print(solver.solve(args.word, args.num_players, args.min_word_length))
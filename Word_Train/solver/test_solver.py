@@ -1,5 +1,11 @@
-from base_classes.lexicon import LanguageLexicon
+import math
+import threading
 
+import pytest
+
+from base_classes.lexicon import LEXICON_BACKENDS, LanguageLexicon
+
+from .substring_solver import SubstringWordTrainSolver
 from .word_train_solver import WordTrainSolver
 
 
@@ -27,6 +33,22 @@ def test_solver_english_words_two_player():
         assert solution.possible_win_letters == expected_possible
 
 
+# Test that every backend solves the same as the default trie
+@pytest.mark.parametrize("backend", LEXICON_BACKENDS)
+def test_solver_english_words_backends(backend):
+    trie_solver = WordTrainSolver(LanguageLexicon("./lexicons/english_test.txt"))
+    solver = WordTrainSolver(
+        LanguageLexicon("./lexicons/english_test.txt", LEXICON_BACKENDS[backend])
+    )
+    for prefix in ["appl", "appli", "applic", "ap", "a"]:
+        for num_players in [2, 3]:
+            solution = solver.solve(prefix, num_players)
+            expected = trie_solver.solve(prefix, num_players)
+            assert solution.certain_win_letters == expected.certain_win_letters
+            assert solution.possible_win_letters == expected.possible_win_letters
+            assert solution.losing_letters == expected.losing_letters
+
+
 # Test certain wins in the next position are found
 def test_trivial_solution():
     lexicon = LanguageLexicon(["apple", "apply", "applesauce"])
@@ -220,3 +242,178 @@ def test_losing_word_longer_than_uncertain_winning_word():
     solution = solver.solve("a", 2)
     assert solution.certain_win_letters == []
     assert solution.possible_win_letters == ["b"]
+
+
+# Test that the words behind each outcome are reported
+def test_solution_words():
+    words = ["apple", "apply", "applesauce", "applier", "applique"]
+    lexicon = LanguageLexicon(words)
+    solver = WordTrainSolver(lexicon)
+    solution = solver.solve("appl", 2)
+    assert solution.certain_win_words == {"apple", "apply"}
+    # The opponent can avoid "applier" by choosing "q" after "appli"
+    assert solution.possible_win_words == {"applier"}
+    assert solution.losing_words == {"applique"}
+
+
+# Test that cached results are updated when the lexicon changes
+def test_solver_lexicon_changes():
+    lexicon = LanguageLexicon(["abcd", "abce"])
+    solver = WordTrainSolver(lexicon, cache_depth=10)
+    solution = solver.solve("", 2)
+    assert solution.certain_win_letters == []
+    lexicon.add_words(["bcdef", "abcfgh"])
+    solution = solver.solve("", 2)
+    assert solution.certain_win_letters == ["b"]
+    assert solution.certain_win_words == {"bcdef"}
+    assert solution.losing_words == {"abcd", "abce", "abcfgh"}
+    lexicon.remove_words(["bcdef"])
+    solution = solver.solve("", 2)
+    assert solution.certain_win_letters == []
+    assert solution.losing_words == {"abcd", "abce", "abcfgh"}
+    # A new word can end the game before words that used to be final
+    lexicon.add_words(["abc"])
+    solution = solver.solve("", 2, 3)
+    assert solution.certain_win_letters == ["a"]
+    assert solution.certain_win_words == {"abc"}
+    lexicon.remove_words(["abc"])
+    solution = solver.solve("", 2, 3)
+    assert solution.certain_win_letters == []
+    assert solution.losing_words == {"abcd", "abce", "abcfgh"}
+    # Positions past a word that would have ended the game can still be solved
+    lexicon.add_words(["abc"])
+    assert solver.solve("abcfg", 2, 3).certain_win_words == {"abcfgh"}
+
+
+# Test that the results for game trie nodes that are replaced are dropped
+@pytest.mark.parametrize("backend", LEXICON_BACKENDS)
+def test_solver_game_trie_cache(backend):
+    lexicon = LanguageLexicon(["abcd", "abce", "abcfgh"], LEXICON_BACKENDS[backend])
+    solver = WordTrainSolver(lexicon, cache_depth=10)
+    solver.solve("", 2, 3)
+    game_trie = lexicon.get_game_trie(3)
+    assert game_trie.get_prefix_node("abcfg") in solver._cache
+    lexicon.add_words(["abc"])
+    nodes = [lexicon.trie.root, game_trie.root]
+    reachable_nodes = []
+    while nodes:
+        node = nodes.pop()
+        reachable_nodes.append(node)
+        nodes.extend(node.children.values())
+    assert all(node in reachable_nodes for node in solver._cache)
+    assert solver.solve("", 2, 3).certain_win_words == {"abc"}
+    # A word too short to be final leaves the game trie's results cached
+    lexicon.add_words(["ab"])
+    assert game_trie.root in solver._cache
+    assert solver.solve("", 2, 3).certain_win_words == {"abc"}
+
+
+# Test that solving several minimum word lengths at once matches solving each separately
+def test_solve_min_word_lengths():
+    lexicon = LanguageLexicon("./lexicons/english_test.txt")
+    solver = WordTrainSolver(lexicon)
+    for prefix, num_players in [("ap", 2), ("appl", 3), ("zy", 2)]:
+        min_word_lengths = [1, 3, 4, 5, 6, 8, 10]
+        solutions = solver.solve_min_word_lengths(prefix, num_players, min_word_lengths)
+        assert list(solutions) == min_word_lengths
+        for min_word_length, solution in solutions.items():
+            assert solution == solver.solve(prefix, num_players, min_word_length)
+
+
+# Test that solving for all seats at once matches solving from each position
+def test_solve_all_seats():
+    words = [
+        "mercury",
+        "mercur",
+        "mars",
+        "marzipan",
+        "marseilles",
+        "venus",
+        "venuses",
+        "earth",
+        "earthy",
+        "earns",
+    ]
+    lexicon = LanguageLexicon(words)
+    solver = WordTrainSolver(lexicon, cache_depth=-1)
+    all_seats_solution = solver.solve_all_seats("", 3)
+    for word in ["", "m", "mar", "mars", "merc", "e", "ear", "earn"]:
+        # The player to move at word is (len(word) % 3) seats after seat 0
+        seat = len(word) % 3
+        assert all_seats_solution.get_solution(seat, word) == solver.solve(word, 3)
+    # Seat 1 finishes "venus" and seat 2 finishes "mercur"
+    assert all_seats_solution.get_certain_win_seats("v") == [1]
+    assert all_seats_solution.get_losing_seats("v") == [0, 2]
+    assert all_seats_solution.get_certain_win_seats("merc") == [2]
+    # After "ma", seat 2 must play "r", and then seat 0 can finish "mars"
+    assert all_seats_solution.get_certain_win_seats("ma") == [0]
+    assert all_seats_solution.get_solution(0, "mar").certain_win_letters == ["s"]
+    # Seat 1 can only win if seat 0 plays "z" instead of "s"
+    assert all_seats_solution.get_solution(1, "mar").possible_win_letters == ["z"]
+    assert all_seats_solution.get_certain_win_seats() == []
+
+
+# Test the anytime solver matches solve given enough time, and only estimates without it
+def test_solve_anytime():
+    lexicon = LanguageLexicon("./lexicons/english_test.txt")
+    solver = WordTrainSolver(lexicon)
+    # "apple" already ended the game, so every letter loses
+    for prefix in ["appl", "ap", "z", "apple"]:
+        # Don't let the anytime solver reuse solve's cache
+        anytime_solution = WordTrainSolver(lexicon).solve_anytime(prefix, 2, 60)
+        solution = solver.solve(prefix, 2)
+        assert anytime_solution.estimated_letters == []
+        assert anytime_solution.proven_letters == list(sorted(lexicon.characters))
+        for name in [
+            "certain_win_letters",
+            "possible_win_letters",
+            "losing_letters",
+            "certain_win_words",
+            "possible_win_words",
+            "losing_words",
+        ]:
+            assert getattr(anytime_solution, name) == getattr(solution, name)
+    # Without any time, every letter that continues a word might still win
+    anytime_solution = WordTrainSolver(lexicon).solve_anytime("ap", 2, 0)
+    letters = list(sorted(lexicon.trie.get_prefix_node("ap").children))
+    assert anytime_solution.estimated_letters == letters
+    assert anytime_solution.possible_win_letters == letters
+    assert anytime_solution.certain_win_letters == []
+    assert "x" in anytime_solution.proven_letters
+    assert anytime_solution.depth == 0
+    # Cancelling stops the search the same way, however much time is left
+    cancelled = threading.Event()
+    cancelled.set()
+    anytime_solution = WordTrainSolver(lexicon).solve_anytime(
+        "ap", 2, math.inf, cancelled=cancelled
+    )
+    assert anytime_solution.estimated_letters == letters
+    assert anytime_solution.depth == 0
+
+
+# Test the two-sided variant, where letters can be added to either end
+def test_substring_solver():
+    lexicon = LanguageLexicon(["apple", "grapple", "ripple", "pal"])
+    solver = SubstringWordTrainSolver(lexicon)
+    assert solver.get_next_words("ppl", 4) == {"appl", "ippl", "pple"}
+    # "ripple" is three letters away, so a win, while "apple" and "grapple" are losses
+    solution = solver.solve("ppl", 2)
+    assert solution.certain_win_letters == ["ippl"]
+    # After "pple", the next player can play "apple" instead of "ipple"
+    assert solution.possible_win_letters == ["pple"]
+    assert solution.certain_win_words == {"ripple"}
+    assert solution.losing_words == {"apple", "grapple"}
+    assert solver.solve("rappl", 2).certain_win_letters == []
+    # "apple" already ended the game, so every move loses and nothing is explored
+    solution = solver.solve("apple", 2)
+    assert solution.certain_win_letters == solution.possible_win_letters == []
+    assert "rapple" in solution.losing_letters and "appler" in solution.losing_letters
+    assert solution.losing_words == {"apple"}
+    assert not solution.certain_win_words and not solution.possible_win_words
+    # The solver follows changes to the lexicon
+    lexicon.add_words(["rapple"])
+    solution = solver.solve("rappl", 2)
+    assert solution.certain_win_letters == ["rapple"]
+    assert solution.certain_win_words == {"rapple"}
+    with pytest.raises(Exception):
+        solver.solve("pal", 2)
@@ -1,36 +1,92 @@
 import argparse
+import threading
+import time
 from dataclasses import dataclass, field
+from typing import Iterable
 
-from base_classes.lexicon import LanguageLexicon, TrieNode
+from base_classes.lexicon import (
+    LEXICON_BACKENDS,
+    LanguageLexicon,
+    LexiconBackend,
+    LexiconListener,
+    TrieNode,
+    WordIdSet,
+    gc_paused,
+)
 
 
 DEFAULT_MINIMUM_WORD_LENGTH = 4
+# Per-node results are cached for prefixes up to this length, since those are
+# the nodes with the largest subtrees (and the fewest of them to store)
+DEFAULT_CACHE_DEPTH = 3
 
 
-class WordTrainSolver:
+class _SearchStopped(Exception):
+    """
+    Raised inside a time-limited search once its deadline has passed
+    or it has been cancelled.
+    """
+
+
+class WordTrainSolver(LexiconListener):
 
     def __init__(
         self,
         lexicon: LanguageLexicon,
+        cache_depth: int = DEFAULT_CACHE_DEPTH,
     ) -> None:
+        """
+        :param lexicon: the lexicon to solve over
+        :param cache_depth: cache per-node results for prefixes up to this length
+        (-1 to disable caching)
+        """
         self.lexicon = lexicon
+        self.cache_depth = cache_depth
+        # node -> (turn, num_players, min_word_length) -> _solve_recursively result
+        self._cache: dict[TrieNode, dict[tuple[int, int, int], tuple]] = dict()
+        lexicon.add_listener(self)
+
+    def before_word_change(self, word: str) -> None:
+        # Only the results for nodes on the changed word's path are affected
+        if not self._cache:
+            return
+        for node in self.lexicon.trie.get_path_nodes(word):
+            self._cache.pop(node, None)
+        for min_word_length, game_trie in self.lexicon.game_tries.items():
+            # Words too short to be final leave the game trie as it is
+            if len(word) < min_word_length:
+                continue
+            for node in game_trie.get_path_nodes(word):
+                self._cache.pop(node, None)
+            # The game trie replaces word's whole subtree, so drop the
+            # results for the nodes below word too
+            node = game_trie.get_prefix_node(word)
+            nodes = [(node, len(word))] if node else []
+            while nodes:
+                node, length = nodes.pop()
+                if length < self.cache_depth:
+                    for child in node.children.values():
+                        self._cache.pop(child, None)
+                        nodes.append((child, length + 1))
 
     @dataclass
     class WordTrainSolution:
         """
         The class corresponding to the return value of solve.
+        Word collections are WordIdSets, which behave like sets of str
+        but only decode their words when iterated.
         """
 
         # Words that occur on the player's turn that the player can get to
         # (as a set, not necessarily any particular word) regardless of other
         # players' choices
-        certain_win_words: set[str]
+        certain_win_words: WordIdSet
 
         # Words that occur on the player's turn that depend on other players' choices
-        possible_win_words: set[str]
+        possible_win_words: WordIdSet
 
         # Words that do not occur on the player's turn
-        losing_words: set[str]
+        losing_words: WordIdSet
 
         # The next letter choices that lead, with perfect play, to a win
         certain_win_letters: list[str] = field(default_factory=lambda: set())
@@ -41,71 +97,526 @@ class WordTrainSolver:
         # The next letter choices that lead only to losses
         losing_letters: list[str] = field(default_factory=lambda: set())
 
+    @dataclass
+    class AnytimeSolution(WordTrainSolution):
+        """
+        The class corresponding to the return value of solve_anytime.
+        Letters are classified as in WordTrainSolution, but only the proven
+        letters are exact. The estimated letters were classified from a
+        search cut off by the time budget, and the word collections only
+        hold the words that search reached.
+        """
+
+        # The letters whose classification is exact
+        proven_letters: list[str] = field(default_factory=list)
+
+        # The letters whose classification is only an estimate
+        estimated_letters: list[str] = field(default_factory=list)
+
+        # How many letters ahead (at least) the estimated letters were searched
+        depth: int = 0
+
+    class AllSeatsSolution:
+        """
+        The class corresponding to the return value of solve_all_seats:
+        the outcomes for every seat at every position in a subtree.
+
+        Seats are numbered relative to the player to move at the solved prefix
+        (seat 0), in turn order.
+        """
+
+        def __init__(
+            self,
+            solver: "WordTrainSolver",
+            prefix: str,
+            num_players: int,
+            # node -> outcomes (see _solve_recursively) indexed by turn
+            outcomes: dict[TrieNode, list[tuple[int, int, int, int]]],
+            # The trie the nodes belong to
+            trie: LexiconBackend,
+        ) -> None:
+            self.solver = solver
+            self.prefix = prefix
+            self.num_players = num_players
+            self._outcomes = outcomes
+            self._trie = trie
+
+        def _get_outcomes(self, seat: int, word: str) -> tuple[int, int, int, int]:
+            if not word.startswith(self.prefix):
+                raise Exception(f"{word} is not in the subtree for {self.prefix}!")
+            node = self.solver._get_prefix_node(word, self._trie)
+            # The turn (as in _solve_recursively) at word from seat's perspective
+            turn = (len(word) - len(self.prefix) - seat) % self.num_players
+            return self._outcomes[node][turn]
+
+        def get_solution(
+            self, seat: int, word: str | None = None
+        ) -> "WordTrainSolver.WordTrainSolution":
+            """
+            Returns the solution for seat at word (by default, the solved prefix).
+            The letters classify the next letter at word by their outcome for seat,
+            whether or not it is seat's turn.
+            """
+            word = self.prefix if word is None else word
+            certain_wins, possible_wins, _, all_losses = self._get_outcomes(seat, word)
+            return self.solver._get_solution(
+                word,
+                self.solver._get_prefix_node(word, self._trie),
+                certain_wins,
+                possible_wins,
+                all_losses,
+                self._trie,
+            )
+
+        def get_certain_win_seats(self, word: str | None = None) -> list[int]:
+            """
+            Returns the seats that can force a win from word
+            (by default, the solved prefix).
+            """
+            word = self.prefix if word is None else word
+            return [
+                seat
+                for seat in range(self.num_players)
+                if self._get_outcomes(seat, word)[0]
+            ]
+
+        def get_losing_seats(self, word: str | None = None) -> list[int]:
+            """
+            Returns the seats that cannot win from word (by default,
+            the solved prefix) however the others play.
+            """
+            word = self.prefix if word is None else word
+            return [
+                seat
+                for seat in range(self.num_players)
+                if not any(self._get_outcomes(seat, word)[:2])
+            ]
+
+    @staticmethod
+    def _resolve_turn(
+        turn: int,
+        certain_wins: int,
+        possible_wins: int,
+        unavoidable_losses: int,
+        all_losses: int,
+    ) -> tuple[int, int, int, int]:
+        """
+        Resolve the outcomes accumulated from a node's children according
+        to whose turn it is at the node.
+        """
+        is_players_turn = turn == 0  # If the player is making the current choice
+        if is_players_turn:
+            # If it's the current player's turn and they have a path to a guaranteed
+            # win, then they can avoid all losses
+            if certain_wins:
+                unavoidable_losses = 0
+        else:
+            # If it's not the current player's turn and there are ways for the current
+            # player to lose, then the current player cannot be guaranteed to avoid
+            # those losses. Thus, at best, the wins they have available are only possible
+            # wins, not certain.
+            if unavoidable_losses:
+                possible_wins |= certain_wins
+                certain_wins = 0
+        return (certain_wins, possible_wins, unavoidable_losses, all_losses)
+
     def _solve_recursively(
         self,
-        original_prefix: str,
-        current_prefix: str,
+        original_prefix_length: int,
+        current_prefix_length: int,
         current_prefix_node: TrieNode,
         num_players: int,
         min_word_length: int,
     ) -> tuple[
-        set[str], set[str], set[str]
-    ]:  # Certain wins, possible wins, unavoidable losses
+        int, int, int, int
+    ]:  # Certain wins, possible wins, unavoidable losses, all losses
         """
         Recurse through the lexicon Trie, accumulating words that are certain wins,
         possible wins, and (unavoidable) losses.
 
-        :param original_prefix: the prefix from which we started the solve procedure
-        :param current_prefix: the prefix for which we are currently solving
-        :param current_prefix_node: the node corresponding to current_prefix in our Trie
+        Words are represented as bitsets in which bit i is the i-th word (in
+        sorted order) in current_prefix_node's subtree. A child's bitset is
+        merged in by shifting it past the words in the subtrees before it.
+
+        :param original_prefix_length: the length of the prefix from which we
+        started the solve procedure
+        :param current_prefix_length: the length of the prefix for which we are
+        currently solving
+        :param current_prefix_node: the node corresponding to the current prefix in our Trie
         :param num_players: the number of players in the game
         :param min_word_length: the minimum number of characters in a final word
-        :return: a tuple of sets corresponding to certain wins, possible wins, and
-        (unavoidable) losses.
+        :return: a tuple of bitsets corresponding to certain wins, possible wins,
+        (unavoidable) losses, and all losing words whether avoidable or not.
         """
         # turn is an integer representing whose turn it is
-        turn = (len(current_prefix) - len(original_prefix)) % num_players
+        turn = (current_prefix_length - original_prefix_length) % num_players
+        is_cached = current_prefix_length <= self.cache_depth
+        if is_cached:
+            cache_key = (turn, num_players, min_word_length)
+            node_cache = self._cache.setdefault(current_prefix_node, dict())
+            if cache_key in node_cache:
+                return node_cache[cache_key]
         was_just_players_turn = turn == 1  # If the player made the last choice
-        if current_prefix_node.is_leaf and len(current_prefix) >= min_word_length:
+        if current_prefix_node.is_leaf and current_prefix_length >= min_word_length:
+            # A leaf is the first word in its own subtree, so its bit is bit 0
             if (
                 was_just_players_turn
             ):  # The final word happened on the current player's turn
-                return (set([current_prefix]), set(), set())
+                return (1, 0, 0, 0)
             else:  # The final word happened on another player's turn
-                return (set(), set(), set([current_prefix]))
+                return (0, 0, 1, 1)
 
-        certain_wins = set()
-        possible_wins = set()
-        unavoidable_losses = set()
+        certain_wins = 0
+        possible_wins = 0
+        unavoidable_losses = 0
+        all_losses = 0
 
         # We will recurse through the Trie, updating certain_wins, possible_wins,
         # and losses
-        for letter in current_prefix_node.children:
-            new_certain_wins, new_possible_wins, new_losses = self._solve_recursively(
-                original_prefix,
-                current_prefix + letter,
-                current_prefix_node.children[letter],
+        # A (non-final) word at this node comes first in the subtree
+        shift = int(current_prefix_node.is_leaf)
+        children = current_prefix_node.children
+        for letter in sorted(children):
+            child = children[letter]
+            new_certain_wins, new_possible_wins, new_losses, new_all_losses = (
+                self._solve_recursively(
+                    original_prefix_length,
+                    current_prefix_length + 1,
+                    child,
+                    num_players,
+                    min_word_length,
+                )
+            )
+            certain_wins |= new_certain_wins << shift
+            possible_wins |= new_possible_wins << shift
+            unavoidable_losses |= new_losses << shift
+            all_losses |= new_all_losses << shift
+            shift += child.word_count
+        result = self._resolve_turn(
+            turn, certain_wins, possible_wins, unavoidable_losses, all_losses
+        )
+        if is_cached:
+            node_cache[cache_key] = result
+        return result
+
+    def _solve_min_word_lengths_recursively(
+        self,
+        original_prefix_length: int,
+        current_prefix_length: int,
+        current_prefix_node: TrieNode,
+        num_players: int,
+        min_word_lengths: list[int],
+    ) -> list[tuple[int, int, int, int]]:
+        """
+        Like _solve_recursively, but for several minimum word lengths at once.
+
+        Below a node, every minimum word length up to the node's prefix length
+        treats the same words as final, so those are solved together; once
+        only one distinct minimum word length is left (as it is for most of
+        the trie), we fall back to _solve_recursively.
+
+        :param min_word_lengths: sorted, distinct minimum word lengths,
+        none less than current_prefix_length
+        :return: the outcomes for each of min_word_lengths, in order
+        """
+        if len(min_word_lengths) == 1:
+            return [
+                self._solve_recursively(
+                    original_prefix_length,
+                    current_prefix_length,
+                    current_prefix_node,
+                    num_players,
+                    min_word_lengths[0],
+                )
+            ]
+        turn = (current_prefix_length - original_prefix_length) % num_players
+        if current_prefix_node.is_leaf and min_word_lengths[0] == current_prefix_length:
+            # The final word for the shortest minimum word length
+            outcomes = [(1, 0, 0, 0) if turn == 1 else (0, 0, 1, 1)]
+            continuing = min_word_lengths[1:]
+        else:
+            outcomes = []
+            continuing = min_word_lengths
+        if not continuing:
+            return outcomes
+        # Below this node, a minimum word length of current_prefix_length
+        # is the same as current_prefix_length + 1
+        child_lengths = continuing
+        if continuing[0] == current_prefix_length:
+            if len(continuing) > 1 and continuing[1] == current_prefix_length + 1:
+                child_lengths = continuing[1:]
+            else:
+                child_lengths = [current_prefix_length + 1] + continuing[1:]
+        # Certain wins, possible wins, unavoidable losses, and all losses
+        # for each of child_lengths
+        certain_wins = [0] * len(child_lengths)
+        possible_wins = [0] * len(child_lengths)
+        unavoidable_losses = [0] * len(child_lengths)
+        all_losses = [0] * len(child_lengths)
+        shift = int(current_prefix_node.is_leaf)
+        children = current_prefix_node.children
+        for letter in sorted(children):
+            child = children[letter]
+            child_outcomes = self._solve_min_word_lengths_recursively(
+                original_prefix_length,
+                current_prefix_length + 1,
+                child,
+                num_players,
+                child_lengths,
+            )
+            for i, (
+                new_certain_wins,
+                new_possible_wins,
+                new_losses,
+                new_all_losses,
+            ) in enumerate(child_outcomes):
+                certain_wins[i] |= new_certain_wins << shift
+                possible_wins[i] |= new_possible_wins << shift
+                unavoidable_losses[i] |= new_losses << shift
+                all_losses[i] |= new_all_losses << shift
+            shift += child.word_count
+        resolved = [
+            self._resolve_turn(turn, *outcome)
+            for outcome in zip(certain_wins, possible_wins, unavoidable_losses, all_losses)
+        ]
+        if len(child_lengths) < len(continuing):
+            # current_prefix_length and current_prefix_length + 1 were merged
+            resolved.insert(0, resolved[0])
+        return outcomes + resolved
+
+    def _solve_all_turns_recursively(
+        self,
+        current_prefix_length: int,
+        current_prefix_node: TrieNode,
+        num_players: int,
+        min_word_length: int,
+        outcomes: dict[TrieNode, list[tuple[int, int, int, int]]],
+    ) -> list[tuple[int, int, int, int]]:
+        """
+        Like _solve_recursively, but for every turn at once, recording the
+        outcomes (indexed by turn) for every node in outcomes.
+
+        The outcome at a node for turn t only depends on the children's
+        outcomes for turn t + 1, so every seat's perspective can be carried
+        up together.
+        """
+        if current_prefix_node.is_leaf and current_prefix_length >= min_word_length:
+            # The final word happened on the turn of the player for whom turn is 1
+            result = [
+                (1, 0, 0, 0) if turn == 1 else (0, 0, 1, 1)
+                for turn in range(num_players)
+            ]
+        else:
+            certain_wins = [0] * num_players
+            possible_wins = [0] * num_players
+            unavoidable_losses = [0] * num_players
+            all_losses = [0] * num_players
+            shift = int(current_prefix_node.is_leaf)
+            children = current_prefix_node.children
+            for letter in sorted(children):
+                child = children[letter]
+                child_outcomes = self._solve_all_turns_recursively(
+                    current_prefix_length + 1,
+                    child,
+                    num_players,
+                    min_word_length,
+                    outcomes,
+                )
+                for turn in range(num_players):
+                    new_certain_wins, new_possible_wins, new_losses, new_all_losses = (
+                        child_outcomes[(turn + 1) % num_players]
+                    )
+                    certain_wins[turn] |= new_certain_wins << shift
+                    possible_wins[turn] |= new_possible_wins << shift
+                    unavoidable_losses[turn] |= new_losses << shift
+                    all_losses[turn] |= new_all_losses << shift
+                shift += child.word_count
+            result = [
+                self._resolve_turn(
+                    turn,
+                    certain_wins[turn],
+                    possible_wins[turn],
+                    unavoidable_losses[turn],
+                    all_losses[turn],
+                )
+                for turn in range(num_players)
+            ]
+        outcomes[current_prefix_node] = result
+        if current_prefix_length <= self.cache_depth:
+            # These are exactly the results solve would cache for this node
+            node_cache = self._cache.setdefault(current_prefix_node, dict())
+            for turn in range(num_players):
+                node_cache[(turn, num_players, min_word_length)] = result[turn]
+        return result
+
+    def _solve_to_depth_recursively(
+        self,
+        original_prefix_length: int,
+        current_prefix_length: int,
+        current_prefix_node: TrieNode,
+        num_players: int,
+        min_word_length: int,
+        depth: int,
+        deadline: float,
+        complete_results: dict[TrieNode, tuple],
+        cancelled: threading.Event | None = None,
+    ) -> tuple[
+        int, int, int, int, bool, bool
+    ]:  # Certain wins, possible wins, unavoidable losses, all losses, uncertain, complete
+        """
+        Like _solve_recursively, but only looks depth letters ahead of
+        current_prefix_node. The outcome of a subtree beyond the horizon is
+        uncertain, so it is treated like an unavoidable loss when it is not
+        the player's turn: certain wins are only reported once proven.
+
+        :param deadline: the time.perf_counter() value after which to give up
+        by raising _SearchStopped
+        :param cancelled: if given, give up (the same way) once this is set
+        :param complete_results: the results for subtrees already searched
+        completely (under nodes that were not), so that deeper rounds do not
+        search them again
+        :return: the four bitsets of _solve_recursively, whether the outcome
+        could still change with a deeper search, and whether the whole
+        subtree was searched (in which case the bitsets are exact)
+        """
+        if current_prefix_node in complete_results:
+            return complete_results[current_prefix_node]
+        if time.perf_counter() > deadline or (cancelled and cancelled.is_set()):
+            raise _SearchStopped()
+        turn = (current_prefix_length - original_prefix_length) % num_players
+        is_cached = current_prefix_length <= self.cache_depth
+        if is_cached:
+            cache_key = (turn, num_players, min_word_length)
+            node_cache = self._cache.setdefault(current_prefix_node, dict())
+            if cache_key in node_cache:
+                return (*node_cache[cache_key], False, True)
+        if current_prefix_node.is_leaf and current_prefix_length >= min_word_length:
+            if turn == 1:  # The final word happened on the current player's turn
+                return (1, 0, 0, 0, False, True)
+            else:  # The final word happened on another player's turn
+                return (0, 0, 1, 1, False, True)
+        if depth == 0 and current_prefix_node.children:
+            return (0, 0, 0, 0, True, False)
+
+        certain_wins = 0
+        possible_wins = 0
+        unavoidable_losses = 0
+        all_losses = 0
+        is_uncertain = False
+        is_complete = True
+        complete_children = []
+        shift = int(current_prefix_node.is_leaf)
+        children = current_prefix_node.children
+        for letter in sorted(children):
+            child = children[letter]
+            child_result = self._solve_to_depth_recursively(
+                original_prefix_length,
+                current_prefix_length + 1,
+                child,
                 num_players,
                 min_word_length,
+                depth - 1,
+                deadline,
+                complete_results,
+                cancelled,
             )
-            certain_wins = certain_wins.union(new_certain_wins)
-            possible_wins = possible_wins.union(new_possible_wins)
-            unavoidable_losses = unavoidable_losses.union(new_losses)
-        is_players_turn = turn == 0  # If the player is making the current choice
-        if is_players_turn:
-            # If it's the current player's turn and they have a path to a guaranteed
-            # win, then they can avoid all losses
+            (
+                new_certain_wins,
+                new_possible_wins,
+                new_losses,
+                new_all_losses,
+                is_child_uncertain,
+                is_child_complete,
+            ) = child_result
+            certain_wins |= new_certain_wins << shift
+            possible_wins |= new_possible_wins << shift
+            unavoidable_losses |= new_losses << shift
+            all_losses |= new_all_losses << shift
+            is_uncertain |= is_child_uncertain
+            if is_child_complete:
+                complete_children.append((child, child_result))
+            else:
+                is_complete = False
+            shift += child.word_count
+        if turn == 0:
             if certain_wins:
-                unavoidable_losses = set()
+                # The player can choose a proven win, whatever lies beyond the horizon
+                unavoidable_losses = 0
+                is_uncertain = False
+        elif unavoidable_losses or is_uncertain:
+            possible_wins |= certain_wins
+            certain_wins = 0
+        result = (
+            certain_wins,
+            possible_wins,
+            unavoidable_losses,
+            all_losses,
+            is_uncertain,
+            is_complete,
+        )
+        if is_complete:
+            if is_cached:
+                # The search reached every word, so this is exactly what solve would cache
+                node_cache[cache_key] = result[:4]
         else:
-            # If it's not the current player's turn and there are ways for the current
-            # player to lose, then the current player cannot be guaranteed to avoid
-            # those losses. Thus, at best, the wins they have available are only possible
-            # wins, not certain.
-            if unavoidable_losses:
-                possible_wins = possible_wins.union(certain_wins)
-                certain_wins = set()
-        return (certain_wins, possible_wins, unavoidable_losses)
+            # The next round will search this node again, but not these children
+            complete_results.update(complete_children)
+        return result
+
+    def _get_game_trie(self, prefix: str, min_word_length: int) -> LexiconBackend:
+        """
+        Returns the trie to solve prefix on: the lexicon's game trie for
+        min_word_length, or the whole lexicon if prefix is not in it
+        (e.g. if it continues past a word that would have ended the game).
+        """
+        game_trie = self.lexicon.get_game_trie(min_word_length)
+        if game_trie.get_prefix_node(prefix):
+            return game_trie
+        return self.lexicon.trie
+
+    def _get_prefix_node(self, prefix: str, trie: LexiconBackend) -> TrieNode:
+        prefix_node = trie.get_prefix_node(prefix)
+        if not prefix_node:
+            raise Exception(f"Prefix {prefix} doex not occur in the lexicon!")
+        return prefix_node
+
+    def _get_solution(
+        self,
+        prefix: str,
+        prefix_node: TrieNode,
+        certain_wins: int,
+        possible_wins: int,
+        all_losses: int,
+        trie: LexiconBackend,
+    ) -> WordTrainSolution:
+        """
+        Decode the bitsets for prefix (over trie's words) into a WordTrainSolution.
+        """
+        # Get the next letter options that lead to wins, possible wins, and unavoidable losses.
+        win_letters = set()
+        possible_win_letters = set()
+        shift = int(prefix_node.is_leaf)
+        for letter in sorted(prefix_node.children):
+            word_count = prefix_node.children[letter].word_count
+            mask = ((1 << word_count) - 1) << shift
+            if certain_wins & mask:
+                win_letters.add(letter)
+            elif possible_wins & mask:
+                possible_win_letters.add(letter)
+            shift += word_count
+        losing_letters = {
+            letter
+            for letter in self.lexicon.characters
+            if letter not in win_letters and letter not in possible_win_letters
+        }
+        return WordTrainSolver.WordTrainSolution(
+            WordIdSet(certain_wins, trie, prefix),
+            WordIdSet(possible_wins, trie, prefix),
+            WordIdSet(all_losses, trie, prefix),
+            list(sorted(win_letters)),
+            list(sorted(possible_win_letters)),
+            list(sorted(losing_letters)),
+        )
 
     def solve(
         self,
@@ -121,47 +632,231 @@ class WordTrainSolver:
         :min_word_length: the minimum number of letters a final word must be
         :returns: an instance of 'WordTrainSolution'
         """
-        # First, recurse over the lexicon Trie, starting at prefix, to get
-        # the wins, and possible that can occur with perfect play.
-        # We ignore losses because we will re-calculate losses to include all
-        # losing words, not just losses that would only occur with perfect play.
-        prefix_node = self.lexicon.trie.get_prefix_node(prefix)
-        if not prefix_node:
-            raise Exception(f"Prefix {prefix} doex not occur in the lexicon!")
-        certain_win_words, possible_win_words, _ = self._solve_recursively(
-            prefix,
-            prefix,
-            prefix_node,
-            num_players,
-            min_word_length,
+        trie = self._get_game_trie(prefix, min_word_length)
+        prefix_node = self._get_prefix_node(prefix, trie)
+        # Recurse over the game trie, starting at prefix, to get the wins
+        # and possible wins that can occur with perfect play, along with all
+        # losing words (not just losses that would only occur with perfect play).
+        with gc_paused():
+            certain_wins, possible_wins, _, all_losses = self._solve_recursively(
+                len(prefix),
+                len(prefix),
+                prefix_node,
+                num_players,
+                min_word_length,
+            )
+        return self._get_solution(
+            prefix, prefix_node, certain_wins, possible_wins, all_losses, trie
         )
-        # Recalculate losing words to include all losing words, not just
-        # unavoidable losses.
-        losing_words = {
-            word
-            for word in self.lexicon.trie.get_all_words(
-                prefix, stop_at_leaf=True, min_length=min_word_length
+
+    def solve_anytime(
+        self,
+        prefix: str,
+        num_players: int,
+        time_budget: float,
+        min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+        cancelled: threading.Event | None = None,
+    ) -> AnytimeSolution:
+        """
+        "Solve" Word Train within a time budget, by iterative deepening:
+        each round searches every unfinished letter (the letters with the
+        fewest words first) twice as many letters ahead as the last, until
+        every letter's subtree has been searched completely. When the budget
+        runs out, the letters not yet proven are classified from the deepest
+        search that finished. With enough time, the result is the same as solve's.
+        Returns an AnytimeSolution instance.
+
+        :param prefix: the prefix to solve from
+        :param num_players: the number of players in the game
+        :param time_budget: the number of seconds to search for
+        (math.inf to search until done or cancelled)
+        :min_word_length: the minimum number of letters a final word must be
+        :param cancelled: if given, stop searching (as if out of time) once this is set
+        :returns: an instance of 'AnytimeSolution'
+        """
+        # Get the node (building the tries if needed) before starting the clock
+        trie = self._get_game_trie(prefix, min_word_length)
+        prefix_node = self._get_prefix_node(prefix, trie)
+        if prefix_node.is_leaf and len(prefix) >= min_word_length:
+            # The game already ended on the last player's turn, as in solve
+            return WordTrainSolver.AnytimeSolution(
+                WordIdSet(0, trie, prefix),
+                WordIdSet(0, trie, prefix),
+                WordIdSet(1, trie, prefix),
+                [],
+                [],
+                list(sorted(self.lexicon.characters)),
+                list(sorted(self.lexicon.characters | set(prefix_node.children))),
+                [],
+                0,
             )
-            if (len(word) - len(prefix)) % num_players != 1
-        }
-        # Get the next letter options that lead to wins, possible wins, and unavoidable losses.
-        win_letters = {word[len(prefix)] for word in certain_win_words}
-        possible_win_letters = {
-            word[len(prefix)] for word in possible_win_words
-        } - win_letters
-        losing_letters = {
+        deadline = time.perf_counter() + time_budget
+        children = prefix_node.children
+        # The latest _solve_to_depth_recursively result for each letter
+        results: dict[str, tuple] = dict()
+        unfinished_letters = list(
+            sorted(children, key=lambda letter: children[letter].word_count)
+        )
+        # How many letters past the next one to search in this round
+        depth = 0
+        # The number of letters ahead searched in the last finished round
+        searched_depth = 0
+        complete_results = dict()
+        with gc_paused():
+            try:
+                while unfinished_letters:
+                    for letter in unfinished_letters:
+                        results[letter] = self._solve_to_depth_recursively(
+                            len(prefix),
+                            len(prefix) + 1,
+                            children[letter],
+                            num_players,
+                            min_word_length,
+                            depth,
+                            deadline,
+                            complete_results,
+                            cancelled,
+                        )
+                    searched_depth = depth + 1
+                    depth = 2 * depth or 1
+                    # Keep searching proven letters too, for the rest of their words
+                    unfinished_letters = [
+                        letter
+                        for letter in unfinished_letters
+                        if not results[letter][5]  # If not searched completely
+                    ]
+            except _SearchStopped:
+                pass
+
+        certain_wins = 0
+        possible_wins = 0
+        all_losses = 0
+        win_letters = []
+        possible_win_letters = []
+        estimated_letters = []
+        shift = int(prefix_node.is_leaf)
+        for letter in sorted(children):
+            if letter in results:
+                (
+                    new_certain_wins,
+                    new_possible_wins,
+                    _,
+                    new_all_losses,
+                    is_uncertain,
+                    _,
+                ) = results[letter]
+            else:  # Never searched
+                new_certain_wins, new_possible_wins, new_all_losses = 0, 0, 0
+                is_uncertain = True
+            certain_wins |= new_certain_wins << shift
+            possible_wins |= new_possible_wins << shift
+            all_losses |= new_all_losses << shift
+            shift += children[letter].word_count
+            if is_uncertain:
+                estimated_letters.append(letter)
+            if new_certain_wins:
+                win_letters.append(letter)
+            # Until a search finds only losses, a letter might still win
+            elif new_possible_wins or (is_uncertain and not new_all_losses):
+                possible_win_letters.append(letter)
+        losing_letters = [
             letter
-            for letter in self.lexicon.characters
+            for letter in sorted(self.lexicon.characters)
             if letter not in win_letters and letter not in possible_win_letters
-        }
-        return WordTrainSolver.WordTrainSolution(
-            certain_win_words,
-            possible_win_words,
-            losing_words,
-            list(sorted(win_letters)),
-            list(sorted(possible_win_letters)),
-            list(sorted(losing_letters)),
+        ]
+        return WordTrainSolver.AnytimeSolution(
+            WordIdSet(certain_wins, trie, prefix),
+            WordIdSet(possible_wins, trie, prefix),
+            WordIdSet(all_losses, trie, prefix),
+            win_letters,
+            possible_win_letters,
+            losing_letters,
+            [
+                letter
+                for letter in sorted(self.lexicon.characters | set(children))
+                if letter not in estimated_letters
+            ],
+            estimated_letters,
+            searched_depth,
+        )
+
+    def solve_all_seats(
+        self,
+        prefix: str,
+        num_players: int,
+        min_word_length: int = DEFAULT_MINIMUM_WORD_LENGTH,
+    ) -> AllSeatsSolution:
+        """
+        "Solve" Word Train for every player at once, in a single traversal.
+        Returns an AllSeatsSolution, which answers for every seat at prefix
+        and at every later position in prefix's subtree.
+
+        :param prefix: the prefix to solve from
+        :param num_players: the number of players in the game
+        :min_word_length: the minimum number of letters a final word must be
+        :returns: an instance of 'AllSeatsSolution'
+        """
+        trie = self._get_game_trie(prefix, min_word_length)
+        prefix_node = self._get_prefix_node(prefix, trie)
+        outcomes = dict()
+        with gc_paused():
+            self._solve_all_turns_recursively(
+                len(prefix), prefix_node, num_players, min_word_length, outcomes
+            )
+        return WordTrainSolver.AllSeatsSolution(
+            self, prefix, num_players, outcomes, trie
+        )
+
+    def solve_min_word_lengths(
+        self,
+        prefix: str,
+        num_players: int,
+        min_word_lengths: Iterable[int],
+    ) -> dict[int, WordTrainSolution]:
+        """
+        "Solve" Word Train for several minimum word lengths in a single
+        traversal of the lexicon Trie.
+
+        :param prefix: the prefix to solve from
+        :param num_players: the number of players in the game
+        :param min_word_lengths: the minimum word lengths to solve for
+        :returns: a dict of minimum word length to 'WordTrainSolution'
+        """
+        # Each length prunes the lexicon differently, so search the whole of it
+        trie = self.lexicon.trie
+        prefix_node = self._get_prefix_node(prefix, trie)
+        # Minimum word lengths up to the prefix length are all equivalent
+        effective_lengths = list(
+            sorted(
+                {
+                    max(min_word_length, len(prefix))
+                    for min_word_length in min_word_lengths
+                }
+            )
         )
+        with gc_paused():
+            outcomes = self._solve_min_word_lengths_recursively(
+                len(prefix),
+                len(prefix),
+                prefix_node,
+                num_players,
+                effective_lengths,
+            )
+        solutions = {
+            effective_length: self._get_solution(
+                prefix, prefix_node, certain_wins, possible_wins, all_losses, trie
+            )
+            for effective_length, (
+                certain_wins,
+                possible_wins,
+                _,
+                all_losses,
+            ) in zip(effective_lengths, outcomes)
+        }
+        return {
+            min_word_length: solutions[max(min_word_length, len(prefix))]
+            for min_word_length in min_word_lengths
+        }
 
 
 if __name__ == "__main__":
@@ -185,16 +880,57 @@ if __name__ == "__main__":
         "-m",
         "--min_word_length",
         type=int,
+        nargs="+",
         required=False,
-        help="The minimum word length for a winning word",
-        default=DEFAULT_MINIMUM_WORD_LENGTH,
+        help="The minimum word length(s) for a winning word",
+        default=[DEFAULT_MINIMUM_WORD_LENGTH],
+    )
+    parser.add_argument(
+        "-a",
+        "--all_seats",
+        action="store_true",
+        help="Solve for every player, not just the player to move",
+    )
+    parser.add_argument(
+        "-t",
+        "--time_budget",
+        type=float,
+        required=False,
+        help="Solve within this many seconds, estimating the letters not yet proven",
+        default=None,
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=list(LEXICON_BACKENDS),
+        default="trie",
+        help="The data structure to store the lexicon in",
     )
     args = parser.parse_args()
     print("\nLoading lexicon ... ")
-    lexicon = LanguageLexicon(args.lexicon)
+    lexicon = LanguageLexicon(args.lexicon, LEXICON_BACKENDS[args.backend])
     print("\nSolving ...")
-    print(
-        WordTrainSolver(lexicon).solve(
+    solver = WordTrainSolver(lexicon)
+    if args.all_seats:
+        for min_word_length in args.min_word_length:
+            all_seats_solution = solver.solve_all_seats(
+                args.word, args.num_players, min_word_length
+            )
+            for seat in range(args.num_players):
+                print(
+                    f"\n-m {min_word_length}, seat {seat}: "
+                    f"{all_seats_solution.get_solution(seat)}"
+                )
+    elif args.time_budget is not None:
+        for min_word_length in args.min_word_length:
+            anytime_solution = solver.solve_anytime(
+                args.word, args.num_players, args.time_budget, min_word_length
+            )
+            print(f"\n-m {min_word_length}: {anytime_solution}")
+    elif len(args.min_word_length) == 1:
+        print(solver.solve(args.word, args.num_players, args.min_word_length[0]))
+    else:
+        for min_word_length, solution in solver.solve_min_word_lengths(
             args.word, args.num_players, args.min_word_length
-        )
-    )
+        ).items():
+            print(f"\n-m {min_word_length}: {solution}")
@@ -0,0 +1,84 @@
+import math
+import threading
+
+from base_classes.lexicon import LanguageLexicon
+from solver.word_train_solver import WordTrainSolver
+from word_train import COMPUTER_TIME_BUDGET, MINIMUM_WORD_LENGTH, SolutionPonderer
+
+
+class BlockingSolver:
+    """
+    A stand-in solver whose pondering searches run until cancelled, recording
+    every search so tests can tell pondered solutions from fallback ones.
+    """
+
+    def __init__(self, blocked_letters: set[str]) -> None:
+        self.blocked_letters = blocked_letters
+        self.calls: list[tuple[str, float]] = []
+        self.started = threading.Event()
+
+    def solve_anytime(
+        self,
+        prefix: str,
+        num_players: int,
+        time_budget: float,
+        min_word_length: int,
+        cancelled: threading.Event | None = None,
+    ) -> tuple[str, float]:
+        self.calls.append((prefix, time_budget))
+        if cancelled and prefix[-1] in self.blocked_letters:
+            self.started.set()
+            cancelled.wait()
+        return (prefix, time_budget)
+
+
+# Test that a letter pondered completely is answered with the same solution as solve
+def test_ponderer_pondered_letter():
+    lexicon = LanguageLexicon("./lexicons/english_test.txt")
+    solver = WordTrainSolver(lexicon)
+    ponderer = SolutionPonderer(solver, "ap", ["p", "t"])
+    ponderer._thread.join()  # Let it ponder every letter
+    for letter in ["p", "t"]:
+        solution = ponderer.get_solution(letter)
+        expected = solver.solve("ap" + letter, 2, MINIMUM_WORD_LENGTH)
+        assert solution.certain_win_letters == expected.certain_win_letters
+        assert solution.possible_win_letters == expected.possible_win_letters
+        assert solution.losing_letters == expected.losing_letters
+        assert solution.certain_win_words == expected.certain_win_words
+
+
+# Test that the letter being pondered is stopped and solved within the budget instead
+def test_ponderer_letter_in_progress():
+    solver = BlockingSolver({"b"})
+    ponderer = SolutionPonderer(solver, "a", ["b", "c"])
+    assert solver.started.wait(5)
+    assert ponderer.get_solution("b") == ("ab", COMPUTER_TIME_BUDGET)
+    assert not ponderer._thread.is_alive()
+    # "c" was never reached
+    assert solver.calls == [("ab", math.inf), ("ab", COMPUTER_TIME_BUDGET)]
+
+
+# Test that a letter pondering never reached is solved within the budget
+def test_ponderer_letter_never_reached():
+    solver = BlockingSolver({"b"})
+    ponderer = SolutionPonderer(solver, "a", ["b", "c"])
+    assert solver.started.wait(5)
+    assert ponderer.get_solution("d") == ("ad", COMPUTER_TIME_BUDGET)
+    assert ponderer.get_solution("c") == ("ac", COMPUTER_TIME_BUDGET)
+
+
+# Test that cancelling stops a search in progress and waits for the thread
+def test_ponderer_cancel():
+    solver = BlockingSolver({"b"})
+    ponderer = SolutionPonderer(solver, "a", ["b", "c"])
+    assert solver.started.wait(5)
+    ponderer.cancel()
+    assert not ponderer._thread.is_alive()
+    assert solver.calls == [("ab", math.inf)]
+    ponderer.cancel()  # Cancelling again does nothing
+
+    # With a real solver, cancelling interrupts the search itself
+    solver = WordTrainSolver(LanguageLexicon("./lexicons/english_test.txt"))
+    ponderer = SolutionPonderer(solver, "", ["s", "c", "p"])
+    ponderer.cancel()
+    assert not ponderer._thread.is_alive()
@@ -1,18 +1,126 @@
 import argparse
+import math
 import random
+import threading
+from typing import Callable
 
-from base_classes.lexicon import LanguageLexicon
+from base_classes.lexicon import LanguageLexicon, TrieNode
 from solver.word_train_solver import WordTrainSolver
 
 MINIMUM_WORD_LENGTH = 4
+# The most time (in seconds) the computer takes to solve a position it did not ponder
+COMPUTER_TIME_BUDGET = 1.0
 
 
-def start_game(lexicon_file_path: str, player_goes_first: bool):
+def choose_computer_letter(
+    node: TrieNode,
+    solution: WordTrainSolver.WordTrainSolution | None,
+    rng: random.Random | None = None,
+) -> str:
+    """
+    The computer's choice of the next letter.
+
+    :param node: the node for the current running word
+    :param solution: the solution for the current running word
+    (None at the beginning of the game, where we choose randomly)
+    :param rng: the random number generator to use (defaults to the random module)
+    """
+    rng = rng or random
+    if solution is None:
+        # Choose randomly at the beginning
+        return rng.choice([key for key in node.children if node.children[key].children])
+    # Very basic logic: we choose letters that work,
+    # but we avoid certain wins when possible to give
+    # the player a chance to win
+    if solution.possible_win_letters:
+        letter = rng.choice(solution.possible_win_letters)
+    elif solution.certain_win_letters:
+        letter = rng.choice(solution.certain_win_letters)
+    else:
+        letter = rng.choice(list(node.children.keys()))
+    return letter
+
+
+class SolutionPonderer:
+    """
+    Solves, in a background thread, every position the computer might face
+    after the player's next letter, so that the computer can reply as soon
+    as the player has chosen. (input() releases the GIL, so the thread runs
+    while the player is thinking.) Pondering searches the same way as
+    solve_anytime, so it stops as soon as it is cancelled.
+    """
+
+    def __init__(
+        self, solver: WordTrainSolver, word: str, letters: list[str]
+    ) -> None:
+        """
+        :param solver: the solver to ponder with
+        :param word: the current running word
+        :param letters: the letters the player might choose next
+        """
+        self.solver = solver
+        self.word = word
+        self._letters = letters
+        # Only complete solutions, written by the thread until it is cancelled
+        self._solutions: dict[str, WordTrainSolver.WordTrainSolution] = dict()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._ponder, daemon=True)
+        self._thread.start()
+
+    def _ponder(self) -> None:
+        for letter in self._letters:
+            solution = self.solver.solve_anytime(
+                self.word + letter,
+                2,
+                math.inf,
+                MINIMUM_WORD_LENGTH,
+                self._cancelled,
+            )
+            if self._cancelled.is_set():
+                return  # The search may have stopped early
+            self._solutions[letter] = solution
+
+    def cancel(self) -> None:
+        """
+        Stop pondering, waiting for the thread to finish
+        """
+        self._cancelled.set()
+        self._thread.join()
+
+    def get_solution(self, letter: str) -> WordTrainSolver.WordTrainSolution:
+        """
+        Returns the solution after the player chooses letter, stopping
+        pondering and solving letter now (within COMPUTER_TIME_BUDGET)
+        if it was not pondered completely.
+        """
+        self.cancel()
+        if letter in self._solutions:
+            return self._solutions[letter]
+        return self.solver.solve_anytime(
+            self.word + letter, 2, COMPUTER_TIME_BUDGET, MINIMUM_WORD_LENGTH
+        )
+
+
+def start_game(
+    lexicon_file_path: str, player_goes_first: bool, model_path: str | None = None
+):
     print("\nLoading lexicon ... ")
     lexicon = LanguageLexicon(lexicon_file_path)
     allowed_letters = lexicon.characters  # Calculate this here to avoid loading later
+    computer_policy = None
+    if model_path:
+        # Only import torch when a model is requested
+        from models.nn_model import load_policy
+
+        computer_policy = load_policy(model_path).choose_letter
     print("\n==Word Train==")
-    game_loop(lexicon, WordTrainSolver(lexicon), allowed_letters, player_goes_first)
+    game_loop(
+        lexicon,
+        WordTrainSolver(lexicon),
+        allowed_letters,
+        player_goes_first,
+        computer_policy,
+    )
 
 
 def game_loop(
@@ -20,15 +128,21 @@ def game_loop(
     solver: WordTrainSolver,
     allowable_letters: set[str],
     player_goes_first: bool,
+    computer_policy: Callable[[str, TrieNode], str] | None = None,
 ) -> None:
     """
     Loop until the game ends, alternating between prompting the user
     for the next letter and letting the computer choose the next letter.
+
+    :param computer_policy: if given, the computer chooses letters with this
+    (e.g., a trained model's NeuralPolicy.choose_letter) instead of solving
     """
-    # TODO: We can maybe make this more efficient by not re-solving every time?
     players_turn = player_goes_first
     word = ""
-    node = lexicon.trie.root
+    # Play only ever visits the game trie, so walk that instead of the whole lexicon
+    game_trie = lexicon.get_game_trie(MINIMUM_WORD_LENGTH)
+    node = game_trie.root
+    ponderer: SolutionPonderer | None = None
 
     def get_letter(word: str) -> str:
         if players_turn:
@@ -41,33 +155,22 @@ def game_loop(
         return letter
 
     def get_computer_letter(word: str) -> str:
-
-        def get_valid_initial_letters() -> list[str]:
-            return [key for key in node.children if node.children[key].children]
-
         print("\nChoosing a letter ...")
+        if computer_policy:
+            return computer_policy(word, node)
         if not word:
-            # Choose randomly at the beginning
-            return random.choice(get_valid_initial_letters())
-        solution = solver.solve(word, 2)
-        # Very basic logic: we choose letters that work,
-        # but we avoid certain wins when possible to give
-        # the player a chance to win
-        if solution.possible_win_words:
-            letter = random.choice(solution.possible_win_letters)
-        elif solution.certain_win_words:
-            letter = random.choice(solution.certain_win_letters)
+            solution = None
+        elif ponderer and ponderer.word == word[:-1]:
+            solution = ponderer.get_solution(word[-1])
         else:
-            letter = random.choice(list(node.children.keys()))
-        return letter
+            solution = solver.solve_anytime(
+                word, 2, COMPUTER_TIME_BUDGET, MINIMUM_WORD_LENGTH
+            )
+        return choose_computer_letter(node, solution)
 
     def handle_invalid_letter(word: str, invalid_letter: str) -> None:
         print(f"\nI win!")
-        valid_words = [
-            word
-            for word in lexicon.trie.get_all_words(word)
-            if len(word) >= MINIMUM_WORD_LENGTH
-        ]
+        valid_words = game_trie.get_all_words(word)
         print(
             f"({word + invalid_letter} does not lead to a valid word. "
             f"I was thinking {valid_words[0]}.)"
@@ -80,20 +183,31 @@ def game_loop(
         else:
             print("\nI got there first! I win!")
 
-    def letter_is_valid(letter: str) -> bool:
-        return node.is_leaf or node.children
-
     # Loop until we reach the end of the word or until we reach an invalid string
     while True:
+        if players_turn and not computer_policy:
+            # Ponder the computer's reply to each letter that continues the game
+            ponderer = SolutionPonderer(
+                solver,
+                word,
+                [
+                    letter
+                    for letter, child in node.children.items()
+                    if not child.is_leaf
+                ],
+            )
         letter = get_letter(word)
-        node = node.children.get(letter)  # Iterate through the prefix tree
-        if not node or not letter_is_valid(letter):
+        if ponderer:
+            ponderer.cancel()
+        # Iterate through the game trie, where every node leads to a final word
+        node = node.children.get(letter)
+        if not node:
             # The letter that was received does not work
             handle_invalid_letter(word, letter)
             break
         word += letter  # Update the running word
-        if node.is_leaf and len(word) >= MINIMUM_WORD_LENGTH:
-            # The letter received wins the game
+        if node.is_leaf:
+            # The letter received completes a final word and wins the game
             handle_winning_word(word)
             break
         players_turn = not players_turn
@@ -101,7 +215,13 @@ def game_loop(
     # End of game
     inp = input("\nPlay Again? (Y)es (N)o: ")
     if inp.lower() == "y":
-        game_loop(lexicon, solver, allowable_letters, not player_goes_first)
+        game_loop(
+            lexicon,
+            solver,
+            allowable_letters,
+            not player_goes_first,
+            computer_policy,
+        )
     else:
         return
 
@@ -120,5 +240,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "-l", "--lexicon", help="What lexicon to load", default="./lexicons/english.txt"
     )
+    parser.add_argument(
+        "-d",
+        "--model",
+        help="A trained model (see models/nn_model.py) for the computer to play with",
+        default=None,
+    )
     args = parser.parse_args()
-    start_game(args.lexicon, "t" in args.first)
+    start_game(args.lexicon, "t" in args.first, args.model)